@@ -0,0 +1,125 @@
+"""Compare the ORM and the columnar monthly aggregation.
+
+uv run python -m benchmarks.bench_aggregation --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time as timer
+from datetime import date, time, timedelta
+
+from sqlmodel import Session, create_engine, insert, select
+
+from analytics import (
+    fetch_entry_columns,
+    net_minutes_array,
+    summarize_columns_by_month,
+    summarize_minutes_by_month_columnar,
+)
+from core import create_tables, net_minutes_between, summarize_minutes_by_month
+from models import Employee, TimeEntry
+
+
+def seed(engine, rows: int, employees: int = 100) -> None:
+    rng = random.Random(42)
+    with Session(engine) as s:
+        s.exec(
+            insert(Employee),
+            params=[
+                {
+                    "first_name": "Bench",
+                    "last_name": f"Mark {i}",
+                    "hire_date": date(2000, 1, 1),
+                    "holidays": 25,
+                    "gender": "unknown",
+                }
+                for i in range(employees)
+            ],
+        )
+        batch = []
+        for i in range(rows):
+            start = time(rng.randrange(24), rng.randrange(60))
+            end = time(rng.randrange(24), rng.randrange(60))
+            pause = time(0, rng.choice((0, 15, 30, 45)))
+            batch.append(
+                {
+                    "employee_id": i % employees + 1,
+                    "Date": date(2000, 1, 1) + timedelta(days=i // employees),
+                    "Start": start,
+                    "Ende": end,
+                    "Pause": pause,
+                    "net_minutes": net_minutes_between(start, end, pause),
+                }
+            )
+            if len(batch) == 50_000:
+                s.exec(insert(TimeEntry.__table__), params=batch)
+                batch.clear()
+        if batch:
+            s.exec(insert(TimeEntry.__table__), params=batch)
+        s.commit()
+
+
+def timed(label: str, fn):
+    t0 = timer.perf_counter()
+    result = fn()
+    print(f"{label:<38} {timer.perf_counter() - t0:8.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        create_tables(engine)
+        timed(f"seed {args.rows} rows", lambda: seed(engine, args.rows))
+
+        with Session(engine) as s:
+            orm = timed(
+                "ORM rows + summarize_minutes_by_month",
+                lambda: summarize_minutes_by_month(s.exec(select(TimeEntry)).all()),
+            )
+            s.expunge_all()
+            columnar = timed(
+                "columnar fetch + aggregate",
+                lambda: summarize_minutes_by_month_columnar(s),
+            )
+            assert columnar == orm, "columnar result differs from the ORM result"
+
+            cols = fetch_entry_columns(s)
+            tuples = list(
+                zip(
+                    cols["date"].tolist(),
+                    cols["start"].tolist(),
+                    cols["end"].tolist(),
+                    cols["pause"].tolist(),
+                )
+            )
+
+        def python_loop():
+            acc = {}
+            for d, start, end, pause in tuples:
+                if end < start:
+                    end += 24 * 60
+                key = (d.year, d.month)
+                acc[key] = acc.get(key, 0) + max(0, end - start - pause)
+            return acc
+
+        loop = timed("aggregate only: Python loop", python_loop)
+        vector = timed(
+            "aggregate only: NumPy",
+            lambda: summarize_columns_by_month(
+                cols["date"],
+                net_minutes_array(cols["start"], cols["end"], cols["pause"]),
+            ),
+        )
+        assert loop == vector
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
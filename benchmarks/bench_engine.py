@@ -0,0 +1,174 @@
+"""Compare SQLite defaults with the performance pragmas from get_engine().
+
+Readers and the writer run as separate processes, each with its own engine,
+like gunicorn workers next to `main.py worker`; so lock waits (or "database
+is locked" errors) show up in the reader latencies.
+
+uv run python -m benchmarks.bench_engine --readers 4 --seconds 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time as timer
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+from unittest import mock
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+
+from benchmarks.bench_aggregation import seed
+from core import create_tables, fetch_monthly_minutes, get_engine, save_time_entry
+from models import TimeEntry
+
+MODES = {
+    # SQLite's defaults: rollback journal, the driver's 5 s lock timeout
+    "defaults": {"SQLITE_PERFORMANCE": "0", "DB_POOL_PRE_PING": "1"},
+    # Pragmas with journal and busy_timeout toggled. Without a timeout a
+    # locked database fails at once; without WAL readers wait for commits.
+    "journal": {
+        "SQLITE_PERFORMANCE": "1",
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_BUSY_TIMEOUT": "0",
+    },
+    "journal+busy": {"SQLITE_PERFORMANCE": "1", "SQLITE_JOURNAL_MODE": "DELETE"},
+    "wal": {"SQLITE_PERFORMANCE": "1", "SQLITE_BUSY_TIMEOUT": "0"},
+    # What get_engine() uses: WAL + busy_timeout
+    "tuned": {"SQLITE_PERFORMANCE": "1", "DB_POOL_PRE_PING": "0"},
+}
+
+
+def mode_env(mode: str, path: str, pool_size: int) -> dict:
+    return {
+        **MODES[mode],
+        "DATABASE_URL": f"sqlite:///{path}",
+        "DB_POOL_SIZE": str(pool_size),
+    }
+
+
+@contextmanager
+def engine_for(env: dict):
+    with mock.patch.dict(os.environ, env):
+        engine = get_engine()
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def reader(env: dict, go, stop, results) -> None:
+    latencies, errors = [], 0
+    with engine_for(env) as engine, Session(engine) as s:
+        fetch_monthly_minutes(s, year=2000)  # connect before the clock starts
+        s.rollback()
+        go.wait()
+        while not stop.is_set():
+            t0 = timer.perf_counter()
+            try:
+                fetch_monthly_minutes(s, year=2000)
+                latencies.append(timer.perf_counter() - t0)
+            except OperationalError:  # "database is locked"
+                errors += 1
+            s.rollback()  # end the read transaction like a request would
+    results.put(("read", latencies, errors))
+
+
+def writer(env: dict, go, stop, results) -> None:
+    writes, errors = 0, 0
+    day = date(2100, 1, 1)
+    with engine_for(env) as engine, Session(engine) as s:
+        go.wait()
+        while not stop.is_set():
+            n = writes + errors
+            te = TimeEntry(
+                employee_id=1 + n % 100,
+                Date=day + timedelta(days=n // 100),
+                Start=time(9, 0),
+                Ende=time(17, 0),
+                Pause=time(0, 30),
+            )
+            try:
+                save_time_entry(s, te)
+                writes += 1
+            except OperationalError:
+                s.rollback()
+                errors += 1
+    results.put(("write", writes, errors))
+
+
+def run_mixed(env: dict, readers: int, seconds: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    go, stop, results = ctx.Event(), ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=reader, args=(env, go, stop, results))
+        for _ in range(readers)
+    ]
+    procs.append(ctx.Process(target=writer, args=(env, go, stop, results)))
+    for p in procs:
+        p.start()
+    timer.sleep(2)  # let every process import and connect
+    go.set()
+    timer.sleep(seconds)
+    stop.set()
+
+    latencies, read_errors, writes, write_errors = [], 0, 0, 0
+    for _ in procs:
+        kind, value, errors = results.get()
+        if kind == "read":
+            latencies += value
+            read_errors += errors
+        else:
+            writes, write_errors = value, errors
+    for p in procs:
+        p.join()
+
+    latencies.sort()
+    return {
+        "reads/s": len(latencies) / seconds,
+        "read p50 ms": statistics.median(latencies) * 1000,
+        "read p95 ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "read p99 ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "read max ms": latencies[-1] * 1000,
+        "read errors": read_errors,
+        "writes/s": writes / seconds,
+        "write errors": write_errors,
+    }
+
+
+def checkouts_per_second(engine, n: int = 5000) -> float:
+    t0 = timer.perf_counter()
+    for _ in range(n):
+        with engine.connect():
+            pass
+    return n / (timer.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in MODES:
+            env = mode_env(mode, os.path.join(tmp, f"{mode}.db"), pool_size=2)
+            with engine_for(env) as engine:
+                create_tables(engine)
+                seed(engine, args.rows)
+                stats = run_mixed(env, args.readers, args.seconds)
+                stats["checkouts/s"] = checkouts_per_second(engine)
+                results[mode] = stats
+
+    print(f"{'':<14}" + "".join(f"{mode:>14}" for mode in results))
+    for metric in results["defaults"]:
+        row = "".join(f"{results[mode][metric]:14.1f}" for mode in results)
+        print(f"{metric:<14}{row}")
+
+
+if __name__ == "__main__":
+    main()
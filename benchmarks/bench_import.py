@@ -0,0 +1,81 @@
+"""Measure how long a fresh interpreter needs to import the web app.
+
+uv run python -m benchmarks.bench_import --runs 10 --max-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Modules only the interactive CLI needs; a web worker must not load them.
+CLI_ONLY_MODULES = ("rich", "main")
+
+PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": sorted(sys.modules),
+}}))
+"""
+
+
+def measure_import(module: str = "flask_app") -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'app.db')}",
+            # Default cache settings, but a path where a created file shows.
+            "REPORT_CACHE_PATH": os.path.join(tmp, "report_cache.sqlite3"),
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(out.splitlines()[-1])
+        result["created_files"] = sorted(os.listdir(tmp))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="flask_app")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    median_ms = statistics.median(r["ms"] for r in runs)
+    max_rss_mb = max(r["max_rss_kb"] for r in runs) / 1024
+    cli_modules = [m for m in CLI_ONLY_MODULES if m in runs[0]["modules"]]
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs")
+    print(f"max RSS after import: {max_rss_mb:.1f} MiB")
+    print(f"modules loaded: {len(runs[0]['modules'])}")
+
+    failed = False
+    if cli_modules:
+        print(f"FAIL: CLI-only modules imported: {', '.join(cli_modules)}")
+        failed = True
+    if runs[0]["created_files"]:
+        print(f"FAIL: import created {', '.join(runs[0]['created_files'])}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"FAIL: median above --max-ms {args.max_ms:.0f}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Time the hot paths against deterministic synthetic databases.
+
+uv run python -m benchmarks.bench_suite --datasets 10x1,100x3 --output bench.json
+uv run python -m benchmarks.bench_suite --baseline bench.json --max-regression 0.25
+
+A dataset "EMPLOYEESxYEARS" has one entry per employee and weekday. Results
+are written as JSON; --baseline compares medians against an earlier run and
+--threshold CASE=MS sets absolute limits. Any violation exits with status 1.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time as timer
+from datetime import date, datetime, time, timedelta, timezone
+from unittest import mock
+
+import sqlalchemy
+from sqlmodel import Session, create_engine, insert
+
+import flask_app
+import main as cli
+from core import (
+    create_tables,
+    fetch_available_years,
+    fetch_employee_entries,
+    net_minutes_between,
+    rebuild_monthly_summary,
+    save_time_entry,
+    summarize_minutes_by_month,
+)
+from models import Employee, TimeEntry
+from report_cache import ReportCache
+
+LAST_YEAR = 2024
+INSERT_BATCH = 50_000
+PAUSES = (time(0, 30), time(0, 45), time(1, 0))
+# Slowdowns smaller than this are timer noise, whatever the percentage.
+REGRESSION_FLOOR_MS = 1.0
+
+
+def parse_dataset(spec: str) -> tuple[int, int]:
+    employees, _, years = spec.lower().partition("x")
+    return int(employees), int(years or 1)
+
+
+def generate_dataset(engine, employees: int, years: int, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    first_day = date(LAST_YEAR - years + 1, 1, 1)
+    with Session(engine) as s:
+        s.exec(
+            insert(Employee),
+            params=[
+                {
+                    "first_name": f"Emp{i:04d}",
+                    "last_name": f"Synthetic{i % 97:02d}",
+                    "hire_date": first_day,
+                    "holidays": 25,
+                    "gender": "unknown",
+                }
+                for i in range(employees)
+            ],
+        )
+        batch = []
+        day = first_day
+        while day.year <= LAST_YEAR:
+            if day.weekday() < 5:
+                for emp_id in range(1, employees + 1):
+                    start = time(rng.randint(7, 9), rng.choice((0, 15, 30, 45)))
+                    end = time(rng.randint(15, 18), rng.choice((0, 15, 30, 45)))
+                    pause = rng.choice(PAUSES)
+                    batch.append(
+                        {
+                            "employee_id": emp_id,
+                            "Date": day,
+                            "Start": start,
+                            "Ende": end,
+                            "Pause": pause,
+                            "net_minutes": net_minutes_between(start, end, pause),
+                        }
+                    )
+                if len(batch) >= INSERT_BATCH:
+                    s.exec(insert(TimeEntry.__table__), params=batch)
+                    batch.clear()
+            day += timedelta(days=1)
+        if batch:
+            s.exec(insert(TimeEntry.__table__), params=batch)
+        s.commit()
+        rebuild_monthly_summary(s)
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up: caches, prepared statements, template compilation
+    samples = []
+    for _ in range(repeat):
+        t0 = timer.perf_counter()
+        fn()
+        samples.append((timer.perf_counter() - t0) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "runs": repeat,
+    }
+
+
+def bench_cases(engine, employees: int, repeat: int) -> dict[str, dict]:
+    results = {}
+    target = employees // 2 + 1
+
+    with Session(engine) as s:
+        results["available_years"] = measure(lambda: fetch_available_years(s), repeat)
+        results["summarize_minutes_by_month"] = measure(
+            lambda: summarize_minutes_by_month(fetch_employee_entries(s, target)),
+            repeat,
+        )
+
+        counter = iter(range(10**9))
+
+        def save_one():
+            n = next(counter)
+            te = TimeEntry(
+                employee_id=target,
+                Date=date(2100, 1, 1) + timedelta(days=n),
+                Start=time(9, 0),
+                Ende=time(17, 0),
+                Pause=time(0, 30),
+            )
+            assert save_time_entry(s, te)
+
+        results["save_time_entry"] = measure(save_one, repeat)
+
+        emp = s.get(Employee, target)
+
+        def cli_report():
+            # Employee picker and month prompt answered up front; "1" picks
+            # the first month so the per-entry listing runs as well.
+            with (
+                mock.patch.object(cli, "pick_employee", return_value=emp),
+                mock.patch("builtins.input", return_value="1"),
+                contextlib.redirect_stdout(io.StringIO()),
+            ):
+                cli.print_report_for_employee(s)
+
+        results["cli_report"] = measure(cli_report, repeat)
+
+    with (
+        mock.patch.object(flask_app, "engine", engine),
+        mock.patch.object(flask_app, "report_cache", ReportCache(max_entries=0)),
+    ):
+        flask_app.app.config["TESTING"] = True
+        with flask_app.app.test_client() as client:
+            client.post(
+                "/login",
+                data={
+                    "username": flask_app.ADMIN_USERNAME,
+                    "password": flask_app.ADMIN_PASSWORD,
+                },
+            )
+
+            def report():
+                resp = client.get(f"/report?year={LAST_YEAR}")
+                assert resp.status_code == 200
+
+            results["report"] = measure(report, repeat)
+    return results
+
+
+def parse_thresholds(items: list[str]) -> dict[str, float]:
+    thresholds = {}
+    for item in items:
+        case, _, ms = item.partition("=")
+        thresholds[case] = float(ms)
+    return thresholds
+
+
+def check(results: dict, args, baseline: dict | None) -> list[str]:
+    failures = []
+    thresholds = parse_thresholds(args.threshold)
+    for dataset, cases in results.items():
+        for case, stats in cases.items():
+            limit = thresholds.get(f"{dataset}:{case}", thresholds.get(case))
+            if limit is not None and stats["median_ms"] > limit:
+                failures.append(
+                    f"{dataset} {case}: {stats['median_ms']:.2f} ms > {limit:.2f} ms"
+                )
+            before = (baseline or {}).get(dataset, {}).get(case)
+            if before and args.max_regression is not None:
+                allowed = max(
+                    before["median_ms"] * (1 + args.max_regression),
+                    before["median_ms"] + REGRESSION_FLOOR_MS,
+                )
+                if stats["median_ms"] > allowed:
+                    failures.append(
+                        f"{dataset} {case}: {stats['median_ms']:.2f} ms vs baseline "
+                        f"{before['median_ms']:.2f} ms "
+                        f"(+{args.max_regression:.0%} allowed)"
+                    )
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", default="10x1,100x3")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare to")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="allowed slowdown vs --baseline as a fraction (default 0.25)",
+    )
+    parser.add_argument(
+        "--threshold",
+        action="append",
+        default=[],
+        metavar="[DATASET:]CASE=MS",
+        help="absolute limit for a median, e.g. report=200 or 100x3:report=400",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for spec in args.datasets.split(","):
+            employees, years = parse_dataset(spec)
+            name = f"{employees}x{years}"
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+            create_tables(engine)
+            t0 = timer.perf_counter()
+            generate_dataset(engine, employees, years)
+            print(f"{name}: generated in {timer.perf_counter() - t0:.1f}s")
+            results[name] = bench_cases(engine, employees, args.repeat)
+            cli.employee_directory.invalidate()
+            engine.dispose()
+            for case, stats in results[name].items():
+                print(f"  {case:<28} {stats['median_ms']:10.2f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "meta": {
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "python": platform.python_version(),
+                        "sqlalchemy": sqlalchemy.__version__,
+                        "platform": platform.platform(),
+                        "repeat": args.repeat,
+                    },
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    failures = check(results, args, baseline)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+import core
+from models import Employee, TimeEntry
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    # Every test gets a fresh database, so drop any cached employees.
+    core.employee_directory.invalidate()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as s:
+        yield s
+
+
+@pytest.fixture
+def add_employee(session):
+    """Factory: add_employee("Grace", "Hopper", hire_date=..., email=...)."""
+
+    def add(
+        first="Ada", last="Lovelace", hire_date=date(2020, 1, 1), s=None, **fields
+    ) -> Employee:
+        s = s or session
+        emp = Employee(first_name=first, last_name=last, hire_date=hire_date, **fields)
+        s.add(emp)
+        s.commit()
+        s.refresh(emp)
+        return emp
+
+    return add
+
+
+@pytest.fixture
+def add_entry(session):
+    """Factory: add_entry(emp, day, start=..., end=..., pause=...)."""
+
+    def add(
+        emp, day, start=time(9, 0), end=time(17, 0), pause=time(0, 30), s=None
+    ) -> TimeEntry:
+        te = TimeEntry(Date=day, Start=start, Ende=end, Pause=pause, employee_id=emp.id)
+        assert core.save_time_entry(s or session, te)
+        return te
+
+    return add
+
+
+@pytest.fixture
+def count_queries(engine):
+    """Context manager collecting the SQL statements run on the test engine."""
+
+    @contextmanager
+    def count():
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return count
+
+
+@pytest.fixture
+def query_budget(count_queries):
+    """Like count_queries, but fails when the block runs more than max_queries."""
+
+    @contextmanager
+    def budget(max_queries: int):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= max_queries, (
+            f"{len(statements)} queries, budget is {max_queries}:\n"
+            + "\n".join(statements)
+        )
+
+    return budget
+
+
+@pytest.fixture
+def client(engine, monkeypatch, tmp_path):
+    import flask_app
+    from report_cache import ReportCache
+
+    monkeypatch.setattr(flask_app, "engine", engine)
+    monkeypatch.setattr(
+        flask_app, "report_cache", ReportCache(str(tmp_path / "report_cache.db"))
+    )
+    flask_app.app.config["TESTING"] = True
+    with flask_app.app.test_client() as c:
+        c.post(
+            "/login",
+            data={
+                "username": flask_app.ADMIN_USERNAME,
+                "password": flask_app.ADMIN_PASSWORD,
+            },
+        )
+        yield c
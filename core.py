@@ -0,0 +1,1309 @@
+# Core of the timetracker: engine setup, queries, aggregation and writes.
+#
+# Shared by the web app, the CLI (main.py) and the benchmarks. Keep it free
+# of terminal/UI imports so gunicorn workers boot without rich.
+from __future__ import annotations
+
+import csv
+import io
+import os
+import threading
+import time as time_module
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    case,
+    cast,
+    delete,
+    event,
+    extract,
+    func,
+    insert,
+    inspect,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import selectinload
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from models import (
+    DataVersion,
+    Employee,
+    Gender,
+    MonthlySummary,
+    OvertimeCheckpoint,
+    TimeEntry,
+    net_minutes_between,
+)
+
+MONTH_EN = [
+    "",
+    "January",
+    "February",
+    "March",
+    "April",
+    "May",
+    "June",
+    "July",
+    "August",
+    "September",
+    "October",
+    "November",
+    "December",
+]
+
+
+def minutes_from_entry(e) -> int:
+    if getattr(e, "net_minutes", None) is not None:
+        return e.net_minutes
+    return net_minutes_between(e.Start, e.Ende, e.Pause)
+
+
+def fmt_hhmm(mins: int) -> str:
+    return f"{mins // 60:02d}:{mins % 60:02d}"
+
+
+# SQLite performance mode: WAL lets readers run while a writer commits,
+# synchronous=NORMAL is durable in WAL mode except against power loss.
+SQLITE_PRAGMA_DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": "268435456",  # 256 MiB
+    "cache_size": "-65536",  # negative = KiB, i.e. 64 MiB per connection
+    "busy_timeout": "5000",
+}
+
+
+def _env_int(name: str) -> int | None:
+    raw = os.getenv(name, "").strip()
+    return int(raw) if raw else None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in ("1", "true", "yes", "on")
+
+
+def engine_options_from_env(db_url: str) -> dict:
+    # DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE (seconds), DB_POOL_PRE_PING.
+    # Unset values keep SQLAlchemy's defaults for the chosen pool class.
+    options: dict = {"pool_pre_ping": _env_flag("DB_POOL_PRE_PING", True)}
+    for env_name, option in (
+        ("DB_POOL_SIZE", "pool_size"),
+        ("DB_MAX_OVERFLOW", "max_overflow"),
+        ("DB_POOL_RECYCLE", "pool_recycle"),
+    ):
+        value = _env_int(env_name)
+        if value is not None:
+            options[option] = value
+
+    connect_args = {}
+    if db_url.startswith("postgresql"):
+        connect_args["sslmode"] = os.getenv("DATABASE_SSLMODE", "require")
+    options["connect_args"] = connect_args
+    return options
+
+
+def sqlite_pragmas_from_env() -> dict[str, str]:
+    # SQLITE_PERFORMANCE=0 keeps SQLite's own defaults; SQLITE_<PRAGMA> overrides
+    # single values, e.g. SQLITE_JOURNAL_MODE=DELETE or SQLITE_MMAP_SIZE=0.
+    if not _env_flag("SQLITE_PERFORMANCE", True):
+        return {}
+    pragmas = {}
+    for name, default in SQLITE_PRAGMA_DEFAULTS.items():
+        value = os.getenv(f"SQLITE_{name.upper()}", default).strip()
+        if not value.lstrip("-").isalnum():
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        pragmas[name] = value
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict[str, str]) -> None:
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def get_engine():
+    db_url = os.getenv("DATABASE_URL", "sqlite:///app.db")
+    if db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql+psycopg2://", 1)
+
+    engine = create_engine(db_url, **engine_options_from_env(db_url))
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine, sqlite_pragmas_from_env())
+    return engine
+
+
+def normalize_email(raw: Optional[str]) -> Optional[str]:
+    if raw is None:
+        return None
+    s = raw.strip()
+    return s.lower() if s else None
+
+
+def calc_age(born: date, ref: date | None = None) -> int:
+    if ref is None:
+        ref = date.today()
+    years = ref.year - born.year
+    if (ref.month, ref.day) < (born.month, born.day):
+        years -= 1
+    return years
+
+
+EMPLOYEE_ORDER = (Employee.last_name, Employee.first_name, Employee.id)
+
+
+def fetch_employees(s: Session) -> List["Employee"]:
+    return s.exec(select(Employee).order_by(*EMPLOYEE_ORDER)).all()
+
+
+def employee_sort_key(emp: "Employee") -> tuple[str, str, int]:
+    return (emp.last_name, emp.first_name, emp.id)
+
+
+def fetch_employee_page(
+    s: Session, after: tuple[str, str, int] | None = None, limit: int = 20
+) -> List["Employee"]:
+    # Keyset pagination: seek past the last (last_name, first_name, id) seen.
+    q = select(Employee).order_by(*EMPLOYEE_ORDER).limit(limit)
+    if after is not None:
+        q = q.where(tuple_(*EMPLOYEE_ORDER) > tuple_(*after))
+    return s.exec(q).all()
+
+
+class EmployeeDirectory:
+    """Per-process copy of the employee list for dropdowns and pickers.
+
+    Reloaded when save_employee()/apply_employee_patch() in this process bump
+    the version, or after ttl seconds so other workers' edits show up too.
+    Without a ttl, EMPLOYEE_CACHE_TTL (default 60) is read on each check, so
+    a value from .env applies even though this module is imported first.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self._ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._employees: list[Employee] = []
+        self._by_id: dict[int, Employee] = {}
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return float(os.getenv("EMPLOYEE_CACHE_TTL", "60"))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_version == self.version
+            and time_module.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def all(self, s: Session) -> list[Employee]:
+        if not self._is_fresh():
+            version = self.version
+            # Detached copies: safe to share between requests and threads.
+            employees = [Employee(**e.model_dump()) for e in fetch_employees(s)]
+            with self._lock:
+                self._employees = employees
+                self._by_id = {e.id: e for e in employees}
+                self._loaded_version = version
+                self._loaded_at = time_module.monotonic()
+        return self._employees
+
+    def get(self, s: Session, employee_id: int) -> Employee | None:
+        self.all(s)
+        return self._by_id.get(employee_id)
+
+
+employee_directory = EmployeeDirectory()
+
+
+@dataclass
+class EmployeePatch:
+    first_name: str | None = None
+    last_name: str | None = None
+    email: str | None = None
+    birth_date: date | None = None
+    hire_date: date | None = None
+    holidays: int | None = None
+
+
+def apply_employee_patch(
+    s: Session, employee_id: int, patch: EmployeePatch
+) -> tuple[bool, str, Employee | None]:
+    emp = s.get(Employee, employee_id)
+    if not emp:
+        return False, "Employee not found.", None
+    if patch.first_name is not None:
+        emp.first_name = patch.first_name
+    if patch.last_name is not None:
+        emp.last_name = patch.last_name
+    if patch.email is not None:
+        emp.email = patch.email
+    if patch.birth_date is not None:
+        emp.birth_date = patch.birth_date
+    if patch.hire_date is not None:
+        # Targets are prorated from the hire date, so closed years may change.
+        mark_checkpoints_stale(s, min(emp.hire_date, patch.hire_date).year, emp.id)
+        emp.hire_date = patch.hire_date
+    if patch.holidays is not None:
+        emp.holidays = patch.holidays
+
+    try:
+        s.add(emp)
+        bump_data_version(s)
+        s.commit()
+        employee_directory.invalidate()
+        s.refresh(emp)
+        return True, "Employee updated.", emp
+    except IntegrityError:
+        s.rollback()
+        return False, "Email already in use (UNIQUE).", None
+    except SQLAlchemyError as e:
+        s.rollback()
+        return False, f"Database error: {e.__class__.__name__}.", None
+
+
+def to_employee(
+    first: str,
+    last: str,
+    email: Optional[str],
+    born: Optional[date],
+    hire: date,
+    holidays: int,
+) -> "Employee":
+    return Employee(
+        first_name=first,
+        last_name=last,
+        email=email,
+        birth_date=born,
+        hire_date=hire,
+        holidays=holidays,
+    )
+
+
+def save_employee(s: Session, emp: "Employee") -> bool:
+    try:
+        s.add(emp)
+        bump_data_version(s)
+        s.commit()
+        employee_directory.invalidate()
+        s.refresh(emp)
+        return True
+    except IntegrityError:
+        s.rollback()
+        return False
+
+
+def email_exists(s: Session, email: Optional[str]) -> bool:
+    if not email:
+        return False
+    q = select(Employee.id).where(Employee.email == email)
+    return s.exec(q).first() is not None
+
+
+def to_time_entry(
+    employee_id: int, d: date, start: str, end: str, pause: str
+) -> "TimeEntry":
+    return TimeEntry.from_input(
+        Date=d.strftime("%d.%m.%Y"),
+        Start=start,
+        Ende=end,
+        Pause=pause,
+        employee_id=employee_id,
+    )
+
+
+def upsert_insert(s: Session, model):
+    dialect = s.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upsert is not supported on {dialect}.")
+
+
+def bump_data_version(s: Session) -> None:
+    # Part of the caller's transaction; readers compare versions to decide
+    # whether cached report pages are still valid.
+    stmt = upsert_insert(s, DataVersion).values(
+        id=1, version=1, updated_at=datetime.now(timezone.utc)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "version": DataVersion.version + 1,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    s.exec(stmt)
+
+
+def fetch_data_version(s: Session) -> tuple[int, datetime | None]:
+    row = s.exec(select(DataVersion.version, DataVersion.updated_at)).first()
+    if row is None:
+        return 0, None
+    version, updated_at = row
+    # SQLite hands the timestamp back without its zone; it is stored as UTC.
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return version, updated_at
+
+
+def monthly_summary_upsert(s: Session):
+    stmt = upsert_insert(s, MonthlySummary)
+    return stmt.on_conflict_do_update(
+        index_elements=["employee_id", "year", "month"],
+        set_={
+            "net_minutes": MonthlySummary.net_minutes + stmt.excluded.net_minutes,
+            "entry_count": MonthlySummary.entry_count + stmt.excluded.entry_count,
+        },
+    )
+
+
+def add_to_monthly_summary(
+    s: Session, employee_id: int, d: date, minutes: int, entries: int = 1
+) -> None:
+    s.exec(
+        monthly_summary_upsert(s),
+        params={
+            "employee_id": employee_id,
+            "year": d.year,
+            "month": d.month,
+            "net_minutes": minutes,
+            "entry_count": entries,
+        },
+    )
+
+
+def mark_checkpoints_stale(
+    s: Session, from_year: int, employee_id: int | None = None
+) -> None:
+    # Closing balances chain, so a change in year Y invalidates Y and later.
+    table = OvertimeCheckpoint.__table__
+    stmt = update(table).where(table.c.year >= from_year).values(stale=True)
+    if employee_id is not None:
+        stmt = stmt.where(table.c.employee_id == employee_id)
+    s.exec(stmt)
+
+
+TIME_ENTRY_KEY = ["employee_id", "Date", "Start"]
+
+
+def save_time_entry(s: Session, te: "TimeEntry") -> bool:
+    # One statement both detects the duplicate and inserts; the unique index
+    # on TIME_ENTRY_KEY keeps concurrent workers from double-booking.
+    te.net_minutes = minutes_from_entry(te)
+    stmt = (
+        upsert_insert(s, TimeEntry)
+        .values(
+            employee_id=te.employee_id,
+            Date=te.Date,
+            Start=te.Start,
+            Ende=te.Ende,
+            Pause=te.Pause,
+            net_minutes=te.net_minutes,
+        )
+        .on_conflict_do_nothing(index_elements=TIME_ENTRY_KEY)
+        .returning(TimeEntry.id)
+    )
+    new_id = s.exec(stmt).scalar_one_or_none()
+    if new_id is None:
+        # Nothing was written; the caller's transaction is left as it was.
+        return False
+    te.id = new_id
+    add_to_monthly_summary(s, te.employee_id, te.Date, te.net_minutes)
+    mark_checkpoints_stale(s, te.Date.year, te.employee_id)
+    bump_data_version(s)
+    s.commit()
+    return True
+
+
+ENTRY_CSV_COLUMNS = ("employee_id", "date", "start", "end", "pause")
+IMPORT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    duplicates: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+@lru_cache(maxsize=4096)
+def _parse_entry_time(raw: str) -> time:
+    return TimeEntry.parse_time(raw)
+
+
+@lru_cache(maxsize=8192)
+def _parse_entry_date(raw: str) -> date:
+    if len(raw) == 10 and raw[4] == "-":
+        return date.fromisoformat(raw)
+    return TimeEntry.parse_ddmmyyyy(raw)
+
+
+def parse_entry_row(row: dict[str, str]) -> dict:
+    # Applies TimeEntry's field validators without building an ORM object per
+    # row; parsed values are memoized since punch-clock data repeats a lot.
+    # date: YYYY-MM-DD or DD.MM.YYYY; pause: minutes or HH:MM.
+    raw_id = (row.get("employee_id") or "").strip()
+    if not raw_id.isdigit():
+        raise ValueError(f"Invalid employee_id {raw_id!r}.")
+    raw_pause = (row.get("pause") or "").strip() or "0"
+    if raw_pause.isdigit() and len(raw_pause) <= 3:
+        h, m = divmod(int(raw_pause), 60)
+        raw_pause = f"{h:02d}:{m:02d}"
+    start = _parse_entry_time((row.get("start") or "").strip())
+    end = _parse_entry_time((row.get("end") or "").strip())
+    pause = _parse_entry_time(raw_pause)
+    return {
+        "employee_id": int(raw_id),
+        "Date": _parse_entry_date((row.get("date") or "").strip()),
+        "Start": start,
+        "Ende": end,
+        "Pause": pause,
+        "net_minutes": net_minutes_between(start, end, pause),
+    }
+
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _existing_entry_keys(s: Session, rows: list[dict]) -> set[tuple]:
+    # Range-bounded probe on the unique (employee_id, Date, Start) index.
+    q = select(TimeEntry.employee_id, TimeEntry.Date, TimeEntry.Start).where(
+        TimeEntry.employee_id.in_({r["employee_id"] for r in rows}),
+        TimeEntry.Date >= min(r["Date"] for r in rows),
+        TimeEntry.Date <= max(r["Date"] for r in rows),
+    )
+    return {tuple(row) for row in s.exec(q)}
+
+
+def _insert_entry_rows(s: Session, rows: list[dict]) -> set[tuple]:
+    # Returns the keys actually inserted. Rows written by someone else since
+    # the duplicate probe are skipped by ON CONFLICT and must not be counted
+    # into the monthly summary.
+    table = TimeEntry.__table__
+    inserted = s.exec(
+        upsert_insert(s, table)
+        .on_conflict_do_nothing(index_elements=TIME_ENTRY_KEY)
+        .returning(*(table.c[name] for name in TIME_ENTRY_KEY), table.c.net_minutes),
+        params=rows,
+    ).all()
+    if not inserted:
+        return set()
+    monthly = Counter()
+    counts = Counter()
+    first_year: dict[int, int] = {}
+    for emp_id, day, _start, net_minutes in inserted:
+        key = (emp_id, day.year, day.month)
+        monthly[key] += net_minutes
+        counts[key] += 1
+        first_year[emp_id] = min(day.year, first_year.get(emp_id, day.year))
+    s.exec(
+        monthly_summary_upsert(s),
+        params=[
+            {
+                "employee_id": emp_id,
+                "year": y,
+                "month": m,
+                "net_minutes": minutes,
+                "entry_count": counts[(emp_id, y, m)],
+            }
+            for (emp_id, y, m), minutes in monthly.items()
+        ],
+    )
+    checkpoints = OvertimeCheckpoint.__table__
+    s.exec(
+        update(checkpoints)
+        .where(
+            checkpoints.c.employee_id == bindparam("emp_id"),
+            checkpoints.c.year >= bindparam("from_year"),
+        )
+        .values(stale=True),
+        params=[{"emp_id": e, "from_year": y} for e, y in first_year.items()],
+    )
+    return {(emp_id, day, start) for emp_id, day, start, _ in inserted}
+
+
+def _split_new_entries(s: Session, entries: list[dict]) -> tuple[list, list]:
+    # Returns (new, duplicates); duplicates exist in the database or earlier
+    # in the same batch.
+    taken = _existing_entry_keys(s, entries)
+    new, duplicates = [], []
+    for entry in entries:
+        key = (entry["employee_id"], entry["Date"], entry["Start"])
+        if key in taken:
+            duplicates.append(entry)
+            continue
+        taken.add(key)
+        new.append(entry)
+    return new, duplicates
+
+
+def import_time_entries(
+    s: Session, stream: IO[str], chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportResult:
+    reader = csv.DictReader(stream)
+    reader.fieldnames = [
+        (name or "").strip().lower() for name in (reader.fieldnames or [])
+    ]
+    missing = [c for c in ENTRY_CSV_COLUMNS if c not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    known_employees = set(s.exec(select(Employee.id)).all())
+    result = ImportResult()
+
+    # Each chunk is committed before the next is probed, so duplicates across
+    # chunks are found in the database and only one chunk is held in memory.
+    for chunk in _chunked(enumerate(reader, start=2), chunk_size):
+        parsed = []
+        for line_no, row in chunk:
+            try:
+                entry = parse_entry_row(row)
+            except (TypeError, ValueError) as e:
+                result.errors.append((line_no, str(e)))
+                continue
+            if entry["employee_id"] not in known_employees:
+                result.errors.append(
+                    (line_no, f"Unknown employee {entry['employee_id']}.")
+                )
+                continue
+            parsed.append(entry)
+
+        if not parsed:
+            continue
+        rows, duplicates = _split_new_entries(s, parsed)
+        result.duplicates += len(duplicates)
+        if rows:
+            created = len(_insert_entry_rows(s, rows))
+            bump_data_version(s)
+            s.commit()
+            result.created += created
+            result.duplicates += len(rows) - created
+    return result
+
+
+def create_time_entries(s: Session, items: list) -> list[dict]:
+    """Validate and insert a batch of entries in a single transaction.
+
+    Items use the CSV import fields. Returns one {"index", "status"} dict per
+    item, where status is "created", "duplicate" or "invalid" (with "error").
+    """
+    results: list[dict] = []
+    parsed: dict[int, dict] = {}
+    for idx, item in enumerate(items):
+        results.append({"index": idx, "status": "invalid"})
+        if not isinstance(item, dict):
+            results[idx]["error"] = "Entry must be an object."
+            continue
+        row = {k: "" if v is None else str(v) for k, v in item.items()}
+        try:
+            parsed[idx] = parse_entry_row(row)
+        except (TypeError, ValueError) as e:
+            results[idx]["error"] = str(e)
+
+    known_employees = set(
+        s.exec(
+            select(Employee.id).where(
+                Employee.id.in_({e["employee_id"] for e in parsed.values()})
+            )
+        ).all()
+    )
+    for idx, entry in list(parsed.items()):
+        if entry["employee_id"] not in known_employees:
+            results[idx]["error"] = f"Unknown employee {entry['employee_id']}."
+            del parsed[idx]
+
+    if not parsed:
+        return results
+    index_of = {id(entry): idx for idx, entry in parsed.items()}
+    rows, duplicates = _split_new_entries(s, list(parsed.values()))
+    for entry in duplicates:
+        results[index_of[id(entry)]]["status"] = "duplicate"
+    if rows:
+        inserted = _insert_entry_rows(s, rows)
+        bump_data_version(s)
+        s.commit()
+        for entry in rows:
+            key = (entry["employee_id"], entry["Date"], entry["Start"])
+            status = "created" if key in inserted else "duplicate"
+            results[index_of[id(entry)]]["status"] = status
+    return results
+
+
+EMPLOYEE_CSV_COLUMNS = ("first_name", "last_name", "hire_date")
+EMPLOYEE_OPTIONAL_COLUMNS = ("email", "birth_date", "holidays", "gender")
+
+
+@dataclass
+class EmployeeImportResult:
+    created: int = 0
+    dry_run: bool = False
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+
+def _validation_message(e: ValueError) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}"
+            for err in e.errors()
+        )
+    return str(e)
+
+
+def parse_employee_row(row: dict[str, str]) -> dict:
+    # Runs Employee's validators (email syntax, hire date after birth date)
+    # and returns a plain row for a Core insert. Dates: YYYY-MM-DD or DD.MM.YYYY.
+    def text(name: str) -> str:
+        return (row.get(name) or "").strip()
+
+    if not text("hire_date"):
+        raise ValueError("hire_date is required.")
+    data = {
+        "first_name": text("first_name"),
+        "last_name": text("last_name"),
+        "email": normalize_email(row.get("email")),
+        "birth_date": (
+            _parse_entry_date(text("birth_date")) if text("birth_date") else None
+        ),
+        "hire_date": _parse_entry_date(text("hire_date")),
+        "gender": text("gender").lower() or Gender.UNKNOWN.value,
+    }
+    if text("holidays"):
+        data["holidays"] = text("holidays")
+    emp = Employee.model_validate(data)
+    return {
+        "first_name": emp.first_name,
+        "last_name": emp.last_name,
+        "email": emp.email,
+        "birth_date": emp.birth_date,
+        "hire_date": emp.hire_date,
+        "holidays": emp.holidays,
+        "gender": emp.gender.name,
+    }
+
+
+def employee_rows_from_csv(stream: IO[str]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(stream)
+    reader.fieldnames = [
+        (name or "").strip().lower() for name in (reader.fieldnames or [])
+    ]
+    missing = [c for c in EMPLOYEE_CSV_COLUMNS if c not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    return enumerate(reader, start=2)
+
+
+def employee_rows_from_json(data) -> Iterator[tuple[int, dict]]:
+    # An array of objects, or {"employees": [...]}; rows are numbered from 1.
+    if isinstance(data, dict):
+        data = data.get("employees")
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array or {"employees": [...]}.')
+    for number, item in enumerate(data, start=1):
+        if isinstance(item, dict):
+            item = {k: "" if v is None else str(v) for k, v in item.items()}
+        yield number, item
+
+
+def _taken_emails(s: Session, emails: set[str]) -> set[str]:
+    # One IN probe on the unique email index per chunk.
+    if not emails:
+        return set()
+    return set(s.exec(select(Employee.email).where(Employee.email.in_(emails))))
+
+
+def _drop_taken(
+    s: Session, parsed: list[tuple[int, dict]], result: EmployeeImportResult
+) -> list[tuple[int, dict]]:
+    taken = _taken_emails(s, {emp["email"] for _, emp in parsed if emp["email"]})
+    new = []
+    for line_no, emp in parsed:
+        if emp["email"] in taken:
+            result.errors.append((line_no, f"Email already in use: {emp['email']}"))
+        else:
+            new.append((line_no, emp))
+    return new
+
+
+def import_employees(
+    s: Session,
+    rows: Iterable[tuple[int, dict]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> EmployeeImportResult:
+    """Validate and insert (line_no, row) pairs chunk by chunk.
+
+    Invalid rows and emails that are taken (in the database or earlier in the
+    input) are reported per row; the other rows are written. With dry_run
+    nothing is written, but the checks and counts are the same.
+    """
+    result = EmployeeImportResult(dry_run=dry_run)
+    seen: dict[str, int] = {}
+    table = Employee.__table__
+
+    for chunk in _chunked(rows, chunk_size):
+        parsed = []
+        for line_no, row in chunk:
+            if not isinstance(row, dict):
+                result.errors.append((line_no, "Employee must be an object."))
+                continue
+            try:
+                emp = parse_employee_row(row)
+            except (TypeError, ValueError) as e:
+                result.errors.append((line_no, _validation_message(e)))
+                continue
+            email = emp["email"]
+            if email in seen:
+                message = f"Duplicate email {email}, first seen in row {seen[email]}."
+                result.errors.append((line_no, message))
+                continue
+            if email:
+                seen[email] = line_no
+            parsed.append((line_no, emp))
+
+        new = _drop_taken(s, parsed, result)
+        if not new:
+            continue
+        if not dry_run:
+            try:
+                s.exec(insert(table), params=[emp for _, emp in new])
+            except IntegrityError:
+                # Another writer took one of the emails since the probe; roll
+                # the chunk back, re-check and insert the rest.
+                s.rollback()
+                new = _drop_taken(s, new, result)
+                if new:
+                    s.exec(insert(table), params=[emp for _, emp in new])
+            bump_data_version(s)
+            s.commit()
+            employee_directory.invalidate()
+        result.created += len(new)
+    result.errors.sort()
+    return result
+
+
+# (Date, Start) is unique per employee, so it is a complete keyset and a
+# prefix-ordered range on ix_time_entry_employee_id_Date_Start.
+ENTRY_ORDER = (TimeEntry.Date, TimeEntry.Start)
+
+
+def fetch_employee_entries(
+    s: Session,
+    employee_id: int,
+    first: date | None = None,
+    after_last: date | None = None,
+) -> List[TimeEntry]:
+    q = (
+        select(TimeEntry)
+        .where(TimeEntry.employee_id == employee_id)
+        .options(selectinload(TimeEntry.employee))
+        .order_by(*ENTRY_ORDER)
+    )
+    if first is not None:
+        q = q.where(TimeEntry.Date >= first)
+    if after_last is not None:
+        q = q.where(TimeEntry.Date < after_last)
+    return s.exec(q).all()
+
+
+def fetch_entry_page(
+    s: Session,
+    employee_id: int,
+    first: date,
+    after_last: date,
+    after: tuple[date, time] | None = None,
+    limit: int = 50,
+) -> List[TimeEntry]:
+    # Keyset pagination inside [first, after_last): seek past the last
+    # (Date, Start) seen, so a page costs the same however long the history.
+    q = (
+        select(TimeEntry)
+        .where(
+            TimeEntry.employee_id == employee_id,
+            TimeEntry.Date >= first,
+            TimeEntry.Date < after_last,
+        )
+        .order_by(*ENTRY_ORDER)
+        .limit(limit)
+    )
+    if after is not None:
+        q = q.where(tuple_(*ENTRY_ORDER) > tuple_(*after))
+    return s.exec(q).all()
+
+
+def fetch_range_totals(
+    s: Session, employee_id: int, first: date, after_last: date
+) -> tuple[int, int]:
+    # (net minutes, entry count) of the range, read from the same index range.
+    minutes, count = s.exec(
+        select(func.coalesce(func.sum(TimeEntry.net_minutes), 0), func.count()).where(
+            TimeEntry.employee_id == employee_id,
+            TimeEntry.Date >= first,
+            TimeEntry.Date < after_last,
+        )
+    ).one()
+    return int(minutes), int(count)
+
+
+def summarize_minutes_by_month(rows: list[TimeEntry]) -> dict[tuple[int, int], int]:
+    acc = Counter()
+    for r in rows:
+        acc[(r.Date.year, r.Date.month)] += minutes_from_entry(r)
+    return dict(acc)
+
+
+def _minutes_of_day(col):
+    return cast(extract("hour", col), Integer) * 60 + cast(
+        extract("minute", col), Integer
+    )
+
+
+def net_minutes_expr():
+    # SQL twin of net_minutes_between(), used to backfill TimeEntry.net_minutes.
+    # extract() compiles to STRFTIME on SQLite and EXTRACT on Postgres.
+    start = _minutes_of_day(TimeEntry.Start)
+    end = _minutes_of_day(TimeEntry.Ende)
+    pause = _minutes_of_day(TimeEntry.Pause)
+    end = case((end < start, end + 24 * 60), else_=end)
+    net = end - start - pause
+    return case((net < 0, 0), else_=net)
+
+
+def year_bounds(year: int) -> tuple[date, date]:
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+    if month == 12:
+        return date(year, 12, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
+def last_due_month(year: int, today: date | None = None) -> int:
+    # Months after today are not due yet and stay out of running balances:
+    # 12 for past years, the current month for this year, 0 for later ones.
+    today = today or date.today()
+    if year < today.year:
+        return 12
+    if year == today.year:
+        return today.month
+    return 0
+
+
+def monthly_minutes_query():
+    year_col = cast(extract("year", TimeEntry.Date), Integer)
+    month_col = cast(extract("month", TimeEntry.Date), Integer)
+    return select(
+        TimeEntry.employee_id,
+        year_col,
+        month_col,
+        func.sum(TimeEntry.net_minutes),
+        func.count(),
+    ).group_by(TimeEntry.employee_id, year_col, month_col)
+
+
+def fetch_monthly_minutes(
+    s: Session,
+    year: int | None = None,
+    employee_id: int | None = None,
+    employee_ids: Iterable[int] | None = None,
+) -> dict[int, dict[tuple[int, int], int]]:
+    q = select(
+        MonthlySummary.employee_id,
+        MonthlySummary.year,
+        MonthlySummary.month,
+        MonthlySummary.net_minutes,
+    )
+    if year is not None:
+        q = q.where(MonthlySummary.year == year)
+    if employee_id is not None:
+        q = q.where(MonthlySummary.employee_id == employee_id)
+    if employee_ids is not None:
+        q = q.where(MonthlySummary.employee_id.in_(list(employee_ids)))
+
+    result: dict[int, dict[tuple[int, int], int]] = {}
+    for emp_id, y, m, minutes in s.exec(q):
+        result.setdefault(emp_id, {})[(y, m)] = minutes
+    return result
+
+
+def rebuild_monthly_summary(s: Session) -> int:
+    s.exec(delete(MonthlySummary))
+    s.exec(
+        insert(MonthlySummary).from_select(
+            ["employee_id", "year", "month", "net_minutes", "entry_count"],
+            monthly_minutes_query(),
+        )
+    )
+    bump_data_version(s)
+    s.commit()
+    return s.exec(select(func.count()).select_from(MonthlySummary)).one()
+
+
+def verify_monthly_summary(
+    s: Session,
+) -> list[tuple[tuple[int, int, int], tuple[int, int], tuple[int, int]]]:
+    expected = {
+        (emp_id, y, m): (int(minutes or 0), count)
+        for emp_id, y, m, minutes, count in s.exec(monthly_minutes_query())
+    }
+    stored = {
+        (r.employee_id, r.year, r.month): (r.net_minutes, r.entry_count)
+        for r in s.exec(select(MonthlySummary))
+    }
+    return [
+        (key, stored.get(key, (0, 0)), expected.get(key, (0, 0)))
+        for key in sorted(expected.keys() | stored.keys())
+        if stored.get(key) != expected.get(key)
+    ]
+
+
+def fetch_available_years(s: Session) -> list[int]:
+    # Loose index scan on ix_time_entry_Date_net_minutes: one MIN() seek per year,
+    # so the cost follows the number of years, not the number of entries.
+    years: list[int] = []
+    first_day = s.exec(select(func.min(TimeEntry.Date))).one()
+    while first_day is not None:
+        years.append(first_day.year)
+        first_day = s.exec(
+            select(func.min(TimeEntry.Date)).where(
+                TimeEntry.Date >= date(first_day.year + 1, 1, 1)
+            )
+        ).one()
+    return years
+
+
+EXPORT_BATCH_SIZE = 1000
+ENTRY_EXPORT_HEADER = [
+    "employee_id",
+    "first_name",
+    "last_name",
+    "date",
+    "start",
+    "end",
+    "pause",
+    "net_minutes",
+]
+SUMMARY_EXPORT_HEADER = [
+    "employee_id",
+    "first_name",
+    "last_name",
+    "year",
+    "month",
+    "net_minutes",
+    "entry_count",
+]
+
+
+def iter_entry_export_rows(
+    engine, year: int | None = None, employee_id: int | None = None
+) -> Iterator[tuple]:
+    # The session lives as long as the generator, so a streamed response can
+    # pull rows batch by batch; yield_per uses a server-side cursor on Postgres.
+    q = (
+        select(
+            TimeEntry.employee_id,
+            Employee.first_name,
+            Employee.last_name,
+            TimeEntry.Date,
+            TimeEntry.Start,
+            TimeEntry.Ende,
+            TimeEntry.Pause,
+            TimeEntry.net_minutes,
+        )
+        .join(Employee, Employee.id == TimeEntry.employee_id)
+        .order_by(TimeEntry.employee_id, TimeEntry.Date, TimeEntry.Start)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if year is not None:
+        first, after_last = year_bounds(year)
+        q = q.where(TimeEntry.Date >= first, TimeEntry.Date < after_last)
+    if employee_id is not None:
+        q = q.where(TimeEntry.employee_id == employee_id)
+
+    with Session(engine) as s:
+        for emp_id, first_name, last_name, d, start, end, pause, net in s.exec(q):
+            yield (
+                emp_id,
+                first_name,
+                last_name,
+                d.isoformat(),
+                f"{start:%H:%M}",
+                f"{end:%H:%M}",
+                f"{pause:%H:%M}",
+                net,
+            )
+
+
+def iter_summary_export_rows(
+    engine, year: int | None = None, employee_id: int | None = None
+) -> Iterator[tuple]:
+    q = (
+        select(
+            MonthlySummary.employee_id,
+            Employee.first_name,
+            Employee.last_name,
+            MonthlySummary.year,
+            MonthlySummary.month,
+            MonthlySummary.net_minutes,
+            MonthlySummary.entry_count,
+        )
+        .join(Employee, Employee.id == MonthlySummary.employee_id)
+        .order_by(MonthlySummary.employee_id, MonthlySummary.year, MonthlySummary.month)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if year is not None:
+        q = q.where(MonthlySummary.year == year)
+    if employee_id is not None:
+        q = q.where(MonthlySummary.employee_id == employee_id)
+
+    with Session(engine) as s:
+        yield from (tuple(row) for row in s.exec(q))
+
+
+def iter_csv(
+    header: list[str], rows: Iterable[tuple], batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    # Send the header before the query runs so the download starts at once.
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % batch_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+# Indexes replaced by a wider one; dropped by migrate().
+OBSOLETE_INDEXES = ["ix_time_entry_Date", "ix_time_entry_employee_id"]
+
+
+def _missing_columns(inspector) -> list:
+    # create_all() never alters existing tables; new nullable columns are
+    # added by migrate.
+    missing = []
+    for table in SQLModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        missing += [
+            (table, column)
+            for column in table.columns
+            if column.name not in existing and column.nullable
+        ]
+    return missing
+
+
+def add_missing_columns(engine) -> list[str]:
+    preparer = engine.dialect.identifier_preparer
+    added = []
+    with engine.begin() as conn:
+        for table, column in _missing_columns(inspect(engine)):
+            conn.execute(
+                text(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} "
+                    f"{column.type.compile(dialect=engine.dialect)}"
+                )
+            )
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def backfill_net_minutes(engine) -> int:
+    with engine.begin() as conn:
+        result = conn.execute(
+            update(TimeEntry)
+            .where(TimeEntry.net_minutes.is_(None))
+            .values(net_minutes=net_minutes_expr())
+        )
+    return result.rowcount
+
+
+def _duplicate_entries_query():
+    # Races before the unique index existed could double-book an entry; all
+    # rows per key but the oldest.
+    table = TimeEntry.__table__
+    key = [table.c[name] for name in TIME_ENTRY_KEY]
+    keep = select(func.min(table.c.id)).group_by(*key)
+    return (
+        select(table.c.id, *key, table.c.Ende, table.c.Pause)
+        .where(table.c.id.not_in(keep))
+        .order_by(table.c.id)
+    )
+
+
+def find_duplicate_entries(engine) -> list:
+    with engine.connect() as conn:
+        return conn.execute(_duplicate_entries_query()).all()
+
+
+def remove_duplicate_entries(engine) -> list:
+    # Returns the deleted rows so the caller can keep a copy.
+    with engine.begin() as conn:
+        rows = conn.execute(_duplicate_entries_query()).all()
+        if rows:
+            conn.execute(
+                delete(TimeEntry).where(TimeEntry.id.in_([r.id for r in rows]))
+            )
+    return rows
+
+
+def _invalid_postgres_indexes(conn) -> set[str]:
+    # Left behind by a CREATE INDEX CONCURRENTLY that failed half-way.
+    return set(
+        conn.execute(
+            text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+            )
+        ).scalars()
+    )
+
+
+def sync_indexes(engine) -> list[str]:
+    """Drop OBSOLETE_INDEXES and create missing model indexes.
+
+    create_all() skips indexes on tables that already exist. On Postgres both
+    run CONCURRENTLY, outside a transaction, so the app keeps writing to
+    time_entry while an index builds; invalid leftovers are rebuilt.
+    """
+    online = engine.dialect.name == "postgresql"
+    quote = engine.dialect.identifier_preparer.quote
+    inspector = inspect(engine)
+    created = []
+    with engine.connect() as conn:
+        if online:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        concurrently = "CONCURRENTLY " if online else ""
+        invalid = _invalid_postgres_indexes(conn) if online else set()
+        for name in OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX {concurrently}IF EXISTS {quote(name)}"))
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in invalid:
+                    conn.execute(
+                        text(f"DROP INDEX {concurrently}IF EXISTS {quote(index.name)}")
+                    )
+                elif index.name in existing:
+                    continue
+                index.dialect_kwargs["postgresql_concurrently"] = online
+                try:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                finally:
+                    index.dialect_kwargs["postgresql_concurrently"] = False
+                created.append(index.name)
+        if not online:
+            conn.commit()
+    return created
+
+
+def migrate(engine, dedupe: bool = False) -> dict[str, object]:
+    """Bring an existing database up to the current models.
+
+    Duplicate entries (same employee, date and start) block the unique index.
+    They are only deleted with dedupe=True and returned as removed_duplicates;
+    otherwise migrate raises ValueError before changing anything.
+    """
+    inspector = inspect(engine)
+    needs_summary = not inspector.has_table(MonthlySummary.__tablename__)
+    needs_dedupe = _lacks_entry_key_index(inspector)
+    if needs_dedupe and not dedupe:
+        duplicates = find_duplicate_entries(engine)
+        if duplicates:
+            raise ValueError(
+                f"{len(duplicates)} duplicate time entries block the unique index; "
+                "run `main.py migrate --dedupe` to remove them (the removed rows "
+                "are printed as CSV)."
+            )
+    SQLModel.metadata.create_all(engine)
+    added = add_missing_columns(engine)
+    backfilled = backfill_net_minutes(engine)
+    removed = remove_duplicate_entries(engine) if needs_dedupe else []
+    created = sync_indexes(engine)
+    if needs_summary or removed:
+        with Session(engine) as s:
+            rebuild_monthly_summary(s)
+    return {
+        "added_columns": added,
+        "backfilled_entries": backfilled,
+        "removed_duplicates": removed,
+        "created_indexes": created,
+        "rebuilt_summary": needs_summary or bool(removed),
+    }
+
+
+def _lacks_entry_key_index(inspector) -> bool:
+    return inspector.has_table(TimeEntry.__tablename__) and not any(
+        ix["name"] == "ix_time_entry_employee_id_Date_Start"
+        for ix in inspector.get_indexes(TimeEntry.__tablename__)
+    )
+
+
+def pending_migrations(engine) -> list[str]:
+    """Changes only `main.py migrate` makes: columns, summary table, entry key."""
+    inspector = inspect(engine)
+    if not inspector.has_table(TimeEntry.__tablename__):
+        return []  # new database, create_all() sets up everything
+    pending = [f"{t.name}.{c.name}" for t, c in _missing_columns(inspector)]
+    if not inspector.has_table(MonthlySummary.__tablename__):
+        pending.append(MonthlySummary.__tablename__)
+    if _lacks_entry_key_index(inspector):
+        pending.append("ix_time_entry_employee_id_Date_Start")
+    return pending
+
+
+def create_tables(engine) -> list[str]:
+    # Missing tables and indexes only; backfills and dedupe stay with migrate.
+    # Returns the pending migrations instead, and then changes nothing: an
+    # empty monthly_summary created here would never be rebuilt.
+    pending = pending_migrations(engine)
+    if not pending:
+        SQLModel.metadata.create_all(engine)
+        sync_indexes(engine)
+    return pending
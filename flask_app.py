@@ -1,9 +1,26 @@
-import calendar
+import base64
+import hashlib
+import io
+import json
 import os
-from datetime import date, datetime
+from collections import Counter
+from datetime import date, datetime, time, timedelta
 
+import click
 from dotenv import load_dotenv
-from flask import Flask, flash, redirect, render_template, request, url_for
+from flask import (
+    Flask,
+    Response,
+    abort,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    stream_with_context,
+    url_for,
+)
+from flask import session as flask_session
 from flask_login import (
     LoginManager,
     UserMixin,
@@ -14,24 +31,45 @@ from flask_login import (
 )
 from sqlmodel import Session
 
-from main import (
+import metrics
+from core import (
+    ENTRY_EXPORT_HEADER,
     MONTH_EN,
-    create_tables,
-    fetch_employee_entries,
-    fetch_employees,
+    SUMMARY_EXPORT_HEADER,
+    create_time_entries,
+    employee_directory,
+    employee_sort_key,
+    fetch_available_years,
+    fetch_data_version,
+    fetch_employee_page,
+    fetch_entry_page,
+    fetch_monthly_minutes,
+    fetch_range_totals,
     fmt_hhmm,
     get_engine,
+    import_time_entries,
+    iter_csv,
+    iter_entry_export_rows,
+    iter_summary_export_rows,
+    migrate,
     minutes_from_entry,
+    month_bounds,
     save_time_entry,
-    summarize_minutes_by_month,
     to_time_entry,
+    year_bounds,
 )
-from models import Employee
+from jobs import submit_job
+from models import Employee, Job, JobResult
+from overtime import due_difference, fetch_carry_over
+from report_cache import report_cache_from_env
+from work_calendar import load_work_calendar
 
 app = Flask(__name__)
 load_dotenv()
 app.secret_key = os.getenv("SECRET_KEY", "dev")
 
+metrics.init_app(app, token=os.getenv("METRICS_TOKEN"))
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
@@ -39,6 +77,10 @@ login_manager.login_message_category = "info"
 
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "test123")
+IMPORT_ERRORS_SHOWN = 100
+API_BATCH_LIMIT = 1000
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "20"))
+ENTRY_PAGE_SIZE = int(os.getenv("ENTRY_PAGE_SIZE", "50"))
 
 
 class SimpleUser(UserMixin):
@@ -55,8 +97,21 @@ def load_user(user_id: str):
     return SINGLE_USER if str(SINGLE_USER.id) == str(user_id) else None
 
 
+# No queries at import time: gunicorn can preload this module in the master
+# and fork workers (see gunicorn.conf.py). Tables are created by
+# `flask --app flask_app init-db` or `python main.py migrate`.
 engine = get_engine()
-create_tables(engine)
+report_cache = report_cache_from_env()
+
+
+@app.cli.command("init-db")
+def init_db():
+    """Create missing tables and run pending migrations."""
+    try:
+        result = migrate(engine)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from None
+    click.echo(", ".join(f"{key}={value}" for key, value in result.items()))
 
 
 def minutes_to_hhmm(mins: int) -> str:
@@ -65,26 +120,12 @@ def minutes_to_hhmm(mins: int) -> str:
     return f"{h:02d}:{m:02d}"
 
 
-def business_minutes_in_month(year: int, month: int, hours_per_day: int = 8) -> int:
-    _, last_day = calendar.monthrange(year, month)
-    workdays = sum(
-        1 for d in range(1, last_day + 1) if date(year, month, d).weekday() < 5
-    )
-    return workdays * hours_per_day * 60
-
-
 def mins_to_hours_txt(mins: int) -> str:
     return str(round((mins or 0) / 60.0, 1)).replace(".", ",")
 
 
 def available_years(session: Session) -> list[int]:
-    years = set()
-    employees = fetch_employees(session)
-    for employee in employees:
-        rows = fetch_employee_entries(session, employee.id)
-        monthly = summarize_minutes_by_month(rows)
-        years.update(y for (y, _m) in monthly.keys())
-    return sorted(years)
+    return fetch_available_years(session)
 
 
 @app.route("/", methods=["GET"])
@@ -125,11 +166,130 @@ def logout():
 @login_required
 def report():
     selected_year = request.args.get("year", type=int) or date.today().year
-    user_name = "User"
+    with Session(engine) as session:
+        version, updated_at = fetch_data_version(session)
+
+    key = f"report:{selected_year}:{current_user.username}:{version}"
+    etag = hashlib.sha1(key.encode()).hexdigest()
+    # Pending flash messages are rendered into the page, so never share it.
+    cacheable = "_flashes" not in flask_session
+
+    if cacheable and request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        body = report_cache.get(key) if cacheable else None
+        if body is None:
+            body = render_report_page(selected_year).encode()
+            if cacheable:
+                report_cache.put(key, body)
+        resp = Response(body, mimetype="text/html")
+
+    resp.set_etag(etag)
+    resp.last_modified = updated_at
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
 
+
+def encode_cursor(employee) -> str:
+    raw = json.dumps(employee_sort_key(employee)).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, str, int]:
+    try:
+        last_name, first_name, emp_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return str(last_name), str(first_name), int(emp_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def build_employee_cards(session: Session, employees, selected_year: int) -> list:
     def hours_text_from_minutes(minutes: int) -> str:
         return f"{round((minutes or 0) / 60.0, 1)}".replace(".", ",")
 
+    employee_ids = [e.id for e in employees]
+    minutes_by_employee = fetch_monthly_minutes(
+        session, year=selected_year, employee_ids=employee_ids
+    )
+    # Last closed balance plus any open years since; no walk through history.
+    carry_over = fetch_carry_over(session, selected_year, employee_ids)
+    work_cal = load_work_calendar(session)
+    employee_cards = []
+
+    for employee in employees:
+        monthly_minutes_summary = minutes_by_employee.get(employee.id, {})
+
+        months_for_selected_year = sorted(
+            (year, month)
+            for (year, month) in monthly_minutes_summary.keys()
+            if year == selected_year
+        )
+
+        month_rows = []
+        # Every due month counts, also those without entries (0 worked).
+        total_difference_minutes = due_difference(
+            work_cal, selected_year, monthly_minutes_summary, employee.hire_date
+        )
+
+        for _year, month in months_for_selected_year:
+            worked_minutes = monthly_minutes_summary.get((selected_year, month), 0)
+            target_minutes = work_cal.target_minutes(
+                selected_year, month, hire_date=employee.hire_date
+            )
+
+            month_rows.append(
+                {
+                    "label": MONTH_EN[month],
+                    "url": url_for(
+                        "employee_entries",
+                        employee_id=employee.id,
+                        year=selected_year,
+                        month=month,
+                    ),
+                    "current_txt": hours_text_from_minutes(worked_minutes),
+                    "target_txt": hours_text_from_minutes(target_minutes),
+                }
+            )
+
+        carry_minutes, carry_stale = carry_over.get(employee.id, (0, False))
+        balance_minutes = carry_minutes + total_difference_minutes
+
+        employee_cards.append(
+            {
+                "id": employee.id,
+                "name": f"{employee.first_name} {employee.last_name}",
+                "months": month_rows,
+                "sum_diff_sign": "-" if total_difference_minutes < 0 else "+",
+                "sum_diff_txt": mins_to_hours_txt(abs(total_difference_minutes)),
+                "carry_sign": "-" if carry_minutes < 0 else "+",
+                "carry_txt": mins_to_hours_txt(abs(carry_minutes)),
+                "balance_sign": "-" if balance_minutes < 0 else "+",
+                "balance_txt": mins_to_hours_txt(abs(balance_minutes)),
+                "balance_stale": carry_stale,
+                "remaining_holidays": employee.holidays,
+                "sick_count": 0,
+            }
+        )
+
+    return employee_cards
+
+
+def load_card_page(
+    session: Session, selected_year: int, after: tuple[str, str, int] | None = None
+) -> tuple[list, str | None]:
+    # One extra row tells us whether another page exists.
+    employees = fetch_employee_page(session, after=after, limit=REPORT_PAGE_SIZE + 1)
+    next_cursor = None
+    if len(employees) > REPORT_PAGE_SIZE:
+        employees = employees[:REPORT_PAGE_SIZE]
+        next_cursor = encode_cursor(employees[-1])
+    return build_employee_cards(session, employees, selected_year), next_cursor
+
+
+def render_report_page(selected_year: int) -> str:
+    user_name = "User"
+
     with Session(engine) as session:
         available_years_list = available_years(session)
 
@@ -137,6 +297,7 @@ def report():
             return render_template(
                 "report.html",
                 employee_cards=[],
+                next_cursor=None,
                 available_years_list=[],
                 selected_year=selected_year,
                 user_name=user_name,
@@ -145,63 +306,184 @@ def report():
         if selected_year not in available_years_list:
             selected_year = max(available_years_list)
 
-        all_employees = fetch_employees(session)
-        employee_cards = []
-
-        for employee in all_employees:
-            time_entries = fetch_employee_entries(session, employee.id)
-            monthly_minutes_summary = summarize_minutes_by_month(time_entries)
-
-            months_for_selected_year = sorted(
-                (year, month)
-                for (year, month) in monthly_minutes_summary.keys()
-                if year == selected_year
-            )
-
-            month_rows = []
-            total_difference_minutes = 0
-
-            for _year, month in months_for_selected_year:
-                worked_minutes = monthly_minutes_summary.get((selected_year, month), 0)
-                target_minutes = business_minutes_in_month(
-                    selected_year, month, hours_per_day=8
-                )
-                total_difference_minutes += worked_minutes - target_minutes
-
-                month_rows.append(
-                    {
-                        "label": MONTH_EN[month],
-                        "current_txt": hours_text_from_minutes(worked_minutes),
-                        "target_txt": hours_text_from_minutes(target_minutes),
-                    }
-                )
-
-            employee_cards.append(
-                {
-                    "id": employee.id,
-                    "name": f"{employee.first_name} {employee.last_name}",
-                    "months": month_rows,
-                    "sum_diff_sign": "-" if total_difference_minutes < 0 else "+",
-                    "sum_diff_txt": mins_to_hours_txt(abs(total_difference_minutes)),
-                    "remaining_holidays": employee.holidays,
-                    "sick_count": 0,
-                }
-            )
+        # Only the first page is rendered here; the rest is fetched on scroll.
+        employee_cards, next_cursor = load_card_page(session, selected_year)
 
     return render_template(
         "report.html",
         employee_cards=employee_cards,
+        next_cursor=next_cursor,
         available_years_list=available_years_list,
         selected_year=selected_year,
         user_name=current_user.username,
     )
 
 
+@app.route("/report/cards", methods=["GET"])
+@login_required
+def report_cards():
+    selected_year = request.args.get("year", type=int) or date.today().year
+    cursor = request.args.get("cursor")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    with Session(engine) as session:
+        cards, next_cursor = load_card_page(session, selected_year, after)
+    return jsonify(cards=cards, next_cursor=next_cursor)
+
+
+def parse_entry_range(args) -> tuple[date, date]:
+    """[first, after_last) from ?from=&to= (inclusive) or ?year=[&month=].
+
+    Without any of them the current month is shown.
+    """
+    if args.get("from") or args.get("to"):
+        try:
+            first = date.fromisoformat(args.get("from", ""))
+            last = date.fromisoformat(args.get("to", ""))
+        except ValueError:
+            raise ValueError("from and to must both be dates (YYYY-MM-DD).") from None
+        if last < first:
+            raise ValueError("to must not be before from.")
+        return first, last + timedelta(days=1)
+
+    today = date.today()
+    year = args.get("year", type=int)
+    month = args.get("month", type=int)
+    if year is None and month is None:
+        return month_bounds(today.year, today.month)
+    year = year or today.year
+    if month is not None and not 1 <= month <= 12:
+        raise ValueError("month must be between 1 and 12.")
+    try:
+        return month_bounds(year, month) if month else year_bounds(year)
+    except (ValueError, OverflowError):
+        raise ValueError("Invalid year.") from None
+
+
+def encode_entry_cursor(entry) -> str:
+    raw = json.dumps([entry.Date.isoformat(), entry.Start.isoformat()]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_entry_cursor(cursor: str) -> tuple[date, time]:
+    try:
+        day, start = json.loads(base64.urlsafe_b64decode(cursor))
+        return date.fromisoformat(day), time.fromisoformat(start)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def entry_row(entry) -> dict:
+    return {
+        "id": entry.id,
+        "date": entry.Date.isoformat(),
+        "date_txt": f"{entry.Date:%d.%m.%Y}",
+        "weekday": f"{entry.Date:%a}",
+        "start": f"{entry.Start:%H:%M}",
+        "end": f"{entry.Ende:%H:%M}",
+        "pause": f"{entry.Pause:%H:%M}",
+        "net_txt": fmt_hhmm(minutes_from_entry(entry)),
+    }
+
+
+def load_entry_page(
+    session: Session,
+    employee_id: int,
+    first: date,
+    after_last: date,
+    after: tuple[date, time] | None = None,
+) -> tuple[list, str | None]:
+    entries = fetch_entry_page(
+        session, employee_id, first, after_last, after=after, limit=ENTRY_PAGE_SIZE + 1
+    )
+    next_cursor = None
+    if len(entries) > ENTRY_PAGE_SIZE:
+        entries = entries[:ENTRY_PAGE_SIZE]
+        next_cursor = encode_entry_cursor(entries[-1])
+    return [entry_row(e) for e in entries], next_cursor
+
+
+@app.route("/report/employee/<int:employee_id>", methods=["GET"])
+@login_required
+def employee_entries(employee_id: int):
+    try:
+        first, after_last = parse_entry_range(request.args)
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for("report"))
+
+    with Session(engine) as session:
+        employee = session.get(Employee, employee_id)
+        if employee is None:
+            abort(404)
+        total_minutes, entry_count = fetch_range_totals(
+            session, employee_id, first, after_last
+        )
+        entries, next_cursor = load_entry_page(session, employee_id, first, after_last)
+
+    last = after_last - timedelta(days=1)
+    is_month = first.day == 1 and month_bounds(first.year, first.month)[1] == after_last
+    nav = {}
+    if is_month:
+        prev_first = (first - timedelta(days=1)).replace(day=1)
+        nav = {
+            "prev": url_for(
+                "employee_entries",
+                employee_id=employee_id,
+                year=prev_first.year,
+                month=prev_first.month,
+            ),
+            "next": url_for(
+                "employee_entries",
+                employee_id=employee_id,
+                year=after_last.year,
+                month=after_last.month,
+            ),
+        }
+    return render_template(
+        "entries.html",
+        employee=employee,
+        range_label=(
+            f"{MONTH_EN[first.month]} {first.year}"
+            if is_month
+            else f"{first:%d.%m.%Y} – {last:%d.%m.%Y}"
+        ),
+        range_params={"from": first.isoformat(), "to": last.isoformat()},
+        nav=nav,
+        total_txt=fmt_hhmm(total_minutes),
+        entry_count=entry_count,
+        entries=entries,
+        next_cursor=next_cursor,
+        selected_year=first.year,
+        user_name=current_user.username,
+    )
+
+
+@app.route("/report/employee/<int:employee_id>/entries", methods=["GET"])
+@login_required
+def employee_entries_page(employee_id: int):
+    cursor = request.args.get("cursor")
+    try:
+        first, after_last = parse_entry_range(request.args)
+        after = decode_entry_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    with Session(engine) as session:
+        entries, next_cursor = load_entry_page(
+            session, employee_id, first, after_last, after
+        )
+    return jsonify(entries=entries, next_cursor=next_cursor)
+
+
 @app.route("/time/record", methods=["GET"])
 @login_required
 def time_record():
     with Session(engine) as s:
-        employees = fetch_employees(s)
+        employees = employee_directory.all(s)
     return render_template("index.html", employees=employees)
 
 
@@ -224,7 +506,16 @@ def add_time():
     te = to_time_entry(int(employee_id), d, start, end_, pause_hhmm)
 
     with Session(engine) as s:
-        emp = s.get(Employee, int(employee_id))
+        emp = employee_directory.get(s, int(employee_id))
+        if emp is None:
+            # Maybe added by another worker since our copy was loaded.
+            emp = s.get(Employee, int(employee_id))
+            if emp is not None:
+                employee_directory.invalidate()
+        if emp is None:
+            flash("Unknown employee.", "error")
+            return redirect(url_for("time_record"))
+
         ok = save_time_entry(s, te)
 
         if not ok:
@@ -240,11 +531,161 @@ def add_time():
             "netto": netto,
         }
 
-        employees = fetch_employees(s)
+        employees = employee_directory.all(s)
 
     flash("Time successfully added!", "success")
     return render_template("index.html", employees=employees, saved_info=saved_info)
 
 
+@app.route("/time/import", methods=["POST"])
+@login_required
+def import_time():
+    upload = request.files.get("file")
+    if upload is None or not upload.filename:
+        return jsonify(error="Please upload a CSV file."), 400
+
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8-sig", newline="")
+    with Session(engine) as s:
+        try:
+            result = import_time_entries(s, stream)
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+
+    return jsonify(
+        created=result.created,
+        duplicates=result.duplicates,
+        error_count=len(result.errors),
+        errors=[
+            {"line": line_no, "message": message}
+            for line_no, message in result.errors[:IMPORT_ERRORS_SHOWN]
+        ],
+    )
+
+
+@app.route("/api/time-entries", methods=["POST"])
+@login_required
+def api_create_time_entries():
+    payload = request.get_json(silent=True)
+    items = payload.get("entries") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify(error="Expected a JSON array of entries."), 400
+    if len(items) > API_BATCH_LIMIT:
+        return jsonify(error=f"At most {API_BATCH_LIMIT} entries per request."), 413
+
+    with Session(engine) as s:
+        results = create_time_entries(s, items)
+
+    statuses = Counter(r["status"] for r in results)
+    return jsonify(
+        created=statuses["created"],
+        duplicates=statuses["duplicate"],
+        invalid=statuses["invalid"],
+        results=results,
+    )
+
+
+def job_json(job: Job) -> dict:
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params),
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "error": job.error,
+    }
+    if job.status == "done":
+        data["result_url"] = url_for("job_result", job_id=job.id)
+    return data
+
+
+@app.route("/jobs", methods=["POST"])
+@login_required
+def submit_background_job():
+    payload = request.get_json(silent=True) or {}
+    with Session(engine) as s:
+        try:
+            job = submit_job(s, payload.get("kind", ""), payload.get("params"))
+        except ValueError as e:
+            return jsonify(error=str(e)), 400
+        resp = jsonify(job_json(job))
+    resp.status_code = 202
+    resp.headers["Location"] = url_for("job_status", job_id=job.id)
+    return resp
+
+
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+@login_required
+def job_status(job_id: int):
+    with Session(engine) as s:
+        job = s.get(Job, job_id)
+        if job is None:
+            return jsonify(error="Job not found."), 404
+        return jsonify(job_json(job))
+
+
+@app.route("/jobs/<int:job_id>/result", methods=["GET"])
+@login_required
+def job_result(job_id: int):
+    with Session(engine) as s:
+        job = s.get(Job, job_id)
+        if job is None:
+            return jsonify(error="Job not found."), 404
+        if job.status != "done":
+            return jsonify(error=f"Job is {job.status}.", status=job.status), 409
+        result = s.get(JobResult, job_id)
+        if result is None:
+            return jsonify(error="Result is gone."), 410
+        return Response(
+            result.data,
+            mimetype=job.result_mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename={job.result_filename}"
+            },
+        )
+
+
+def csv_download(filename: str, chunks) -> Response:
+    return Response(
+        stream_with_context(chunks),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def export_filename(kind: str, year: int | None, employee_id: int | None) -> str:
+    parts = [kind]
+    if year is not None:
+        parts.append(str(year))
+    if employee_id is not None:
+        parts.append(f"employee-{employee_id}")
+    return "_".join(parts) + ".csv"
+
+
+@app.route("/export/entries.csv", methods=["GET"])
+@login_required
+def export_entries():
+    year = request.args.get("year", type=int)
+    employee_id = request.args.get("employee_id", type=int)
+    rows = iter_entry_export_rows(engine, year=year, employee_id=employee_id)
+    return csv_download(
+        export_filename("time_entries", year, employee_id),
+        iter_csv(ENTRY_EXPORT_HEADER, rows),
+    )
+
+
+@app.route("/export/summary.csv", methods=["GET"])
+@login_required
+def export_summary():
+    year = request.args.get("year", type=int)
+    employee_id = request.args.get("employee_id", type=int)
+    rows = iter_summary_export_rows(engine, year=year, employee_id=employee_id)
+    return csv_download(
+        export_filename("monthly_summary", year, employee_id),
+        iter_csv(SUMMARY_EXPORT_HEADER, rows),
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,18 @@
+# Gunicorn picks this file up automatically from the working directory.
+#
+# The app is imported once in the master and workers are forked from it, so
+# Flask, SQLAlchemy and the models are shared copy-on-write instead of being
+# imported again by every worker.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Pooled connections must not cross a fork; close=False leaves any the
+    # master opened to the master and gives the worker an empty pool.
+    import flask_app
+
+    flask_app.engine.dispose(close=False)
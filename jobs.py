@@ -0,0 +1,284 @@
+# Background jobs for reports and exports that outlive a web request.
+#
+# The web app only inserts a queued row into the job table; `main.py worker`
+# claims jobs one at a time and stores the result file in the job_result
+# table, so web and worker processes need no shared disk. Claiming is an
+# UPDATE ... WHERE status = 'queued' guarded by the affected row count, so
+# several workers can share one queue on SQLite and Postgres alike.
+import io
+import json
+import os
+import socket
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from core import (
+    ENTRY_EXPORT_HEADER,
+    SUMMARY_EXPORT_HEADER,
+    fetch_employees,
+    fetch_monthly_minutes,
+    iter_csv,
+    iter_entry_export_rows,
+    iter_summary_export_rows,
+)
+from models import Job, JobResult
+from overtime import due_months, fetch_carry_over
+from work_calendar import load_work_calendar
+
+JOB_POLL_INTERVAL = 2.0
+# A claimed job that has not finished after this many seconds belongs to a
+# worker that died (dyno restart, OOM kill); it is queued again, and failed
+# for good once it has been claimed JOB_MAX_ATTEMPTS times.
+JOB_MAX_ATTEMPTS = 3
+
+YEARLY_STATEMENT_HEADER = [
+    "employee_id",
+    "first_name",
+    "last_name",
+    "year",
+    "month",
+    "worked_minutes",
+    "target_minutes",
+    "balance_minutes",
+    "cumulative_balance_minutes",
+]
+
+
+def iter_yearly_statement_rows(engine, year: int) -> Iterator[tuple]:
+    # The cumulative balance starts from the carry-over into this year and
+    # stops at the current month.
+    with Session(engine) as s:
+        minutes = fetch_monthly_minutes(s, year=year)
+        work_cal = load_work_calendar(s)
+        carry_over = fetch_carry_over(s, year)
+        for emp in fetch_employees(s):
+            worked_by_month = minutes.get(emp.id, {})
+            cumulative = carry_over.get(emp.id, (0, False))[0]
+            for month, worked, target in due_months(
+                work_cal, year, worked_by_month, emp.hire_date
+            ):
+                cumulative += worked - target
+                yield (
+                    emp.id,
+                    emp.first_name,
+                    emp.last_name,
+                    year,
+                    month,
+                    worked,
+                    target,
+                    worked - target,
+                    cumulative,
+                )
+
+
+@dataclass(frozen=True)
+class JobKind:
+    params: tuple[str, ...]
+    required: tuple[str, ...]
+    run: Callable[..., Iterable[str]]
+    filename: Callable[[dict], str]
+    mimetype: str = "text/csv"
+
+
+def _csv_name(kind: str, params: dict) -> str:
+    parts = [kind]
+    if params.get("year") is not None:
+        parts.append(str(params["year"]))
+    if params.get("employee_id") is not None:
+        parts.append(f"employee-{params['employee_id']}")
+    return "_".join(parts) + ".csv"
+
+
+JOB_KINDS = {
+    "entries_export": JobKind(
+        params=("year", "employee_id"),
+        required=(),
+        run=lambda engine, year=None, employee_id=None: iter_csv(
+            ENTRY_EXPORT_HEADER, iter_entry_export_rows(engine, year, employee_id)
+        ),
+        filename=lambda p: _csv_name("time_entries", p),
+    ),
+    "summary_export": JobKind(
+        params=("year", "employee_id"),
+        required=(),
+        run=lambda engine, year=None, employee_id=None: iter_csv(
+            SUMMARY_EXPORT_HEADER, iter_summary_export_rows(engine, year, employee_id)
+        ),
+        filename=lambda p: _csv_name("monthly_summary", p),
+    ),
+    "yearly_statement": JobKind(
+        params=("year",),
+        required=("year",),
+        run=lambda engine, year: iter_csv(
+            YEARLY_STATEMENT_HEADER, iter_yearly_statement_rows(engine, year)
+        ),
+        filename=lambda p: _csv_name("yearly_statement", p),
+    ),
+}
+
+
+def parse_job_params(kind: str, raw: dict | None) -> dict:
+    if kind not in JOB_KINDS:
+        raise ValueError(
+            f"Unknown job kind {kind!r}; expected one of {', '.join(JOB_KINDS)}."
+        )
+    spec = JOB_KINDS[kind]
+    raw = raw or {}
+    if not isinstance(raw, dict):
+        raise ValueError("params must be an object.")
+    unknown = sorted(set(raw) - set(spec.params))
+    if unknown:
+        raise ValueError(f"Unknown parameter(s): {', '.join(unknown)}.")
+    params = {}
+    for name in spec.params:
+        value = raw.get(name)
+        if value is None:
+            if name in spec.required:
+                raise ValueError(f"Parameter {name!r} is required.")
+            continue
+        try:
+            params[name] = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parameter {name!r} must be an integer.") from None
+    return params
+
+
+def submit_job(s: Session, kind: str, params: dict | None = None) -> Job:
+    job = Job(kind=kind, params=json.dumps(parse_job_params(kind, params)))
+    s.add(job)
+    s.commit()
+    s.refresh(job)
+    return job
+
+
+def job_timeout() -> float:
+    # Read per call, so a JOB_TIMEOUT from .env (loaded after import) counts.
+    return float(os.getenv("JOB_TIMEOUT", "3600"))
+
+
+def requeue_stale_jobs(
+    s: Session, timeout: float | None = None, now: datetime | None = None
+) -> int:
+    timeout = job_timeout() if timeout is None else timeout
+    now = now or datetime.now(timezone.utc)
+    stale = (Job.status == "running", Job.started_at < now - timedelta(seconds=timeout))
+    # "fetch": SQLite hands back naive timestamps, which Python cannot compare
+    # with now when evaluating the WHERE against loaded objects.
+    sync = {"synchronize_session": "fetch"}
+    failed = s.exec(
+        update(Job)
+        .where(*stale, Job.attempts >= JOB_MAX_ATTEMPTS)
+        .values(
+            status="failed",
+            error=f"Worker stopped responding {JOB_MAX_ATTEMPTS} times.",
+            finished_at=now,
+        ),
+        execution_options=sync,
+    ).rowcount
+    requeued = s.exec(
+        update(Job).where(*stale).values(status="queued", worker=None, started_at=None),
+        execution_options=sync,
+    ).rowcount
+    s.commit()
+    return failed + requeued
+
+
+def claim_next_job(s: Session, worker: str, timeout: float | None = None) -> Job | None:
+    requeue_stale_jobs(s, timeout)
+    while True:
+        job_id = s.exec(
+            select(Job.id).where(Job.status == "queued").order_by(Job.id).limit(1)
+        ).first()
+        if job_id is None:
+            return None
+        claimed = s.exec(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(
+                status="running",
+                worker=worker,
+                started_at=datetime.now(timezone.utc),
+                attempts=Job.attempts + 1,
+            )
+        ).rowcount
+        s.commit()
+        if claimed:
+            return s.get(Job, job_id)
+        # Another worker won the race for this row; try the next one.
+
+
+def finish_job(s: Session, job: Job, worker: str, result: JobResult | None) -> bool:
+    # Guarded like the claim: if the job timed out and was requeued meanwhile,
+    # the outcome is dropped and the new claim wins.
+    finished = s.exec(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "running", Job.worker == worker)
+        .values(
+            status=job.status,
+            error=job.error,
+            finished_at=job.finished_at,
+            result_filename=job.result_filename,
+            result_mimetype=job.result_mimetype,
+        )
+    ).rowcount
+    if finished and result is not None:
+        s.add(result)
+    s.commit()
+    return bool(finished)
+
+
+def run_job(engine, job: Job) -> JobResult | None:
+    spec = JOB_KINDS[job.kind]
+    params = json.loads(job.params)
+    try:
+        buf = io.BytesIO()
+        for chunk in spec.run(engine, **params):
+            buf.write(chunk.encode("utf-8"))
+    except Exception as e:
+        job.status = "failed"
+        job.error = "".join(traceback.format_exception_only(e)).strip()
+        result = None
+    else:
+        job.status = "done"
+        job.result_filename = spec.filename(params)
+        job.result_mimetype = spec.mimetype
+        result = JobResult(job_id=job.id, data=buf.getvalue())
+    job.finished_at = datetime.now(timezone.utc)
+    return result
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def work(
+    engine,
+    worker: str | None = None,
+    poll_interval: float = JOB_POLL_INTERVAL,
+    once: bool = False,
+    on_job: Callable[[Job], None] | None = None,
+) -> int:
+    """Process queued jobs until interrupted; with once=True until idle."""
+    worker = worker or default_worker_name()
+    processed = 0
+    with Session(engine) as s:
+        while True:
+            job = claim_next_job(s, worker)
+            if job is None:
+                if once:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+            s.expunge(job)  # run_job's changes are written by finish_job only
+            result = run_job(engine, job)
+            if not finish_job(s, job, worker, result):
+                continue
+            processed += 1
+            if on_job:
+                on_job(job)
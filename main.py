@@ -1,66 +1,70 @@
 from __future__ import annotations
 
-import os
-from collections import Counter
-from dataclasses import dataclass
+import argparse
+import csv
+import json
+import sys
+import time as time_module
 from datetime import date, datetime
 from typing import List, Optional, Tuple
 
+from dotenv import load_dotenv
 from rich import print
 from rich.console import Console
 from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
-from sqlalchemy.orm import selectinload
-from sqlmodel import Session, SQLModel, create_engine, select
-
-from models import Employee, TimeEntry
+from sqlmodel import Session, select
+
+from core import (
+    ENTRY_CSV_COLUMNS,
+    IMPORT_CHUNK_SIZE,
+    MONTH_EN,
+    EmployeePatch,
+    apply_employee_patch,
+    bump_data_version,
+    calc_age,
+    create_tables,
+    email_exists,
+    employee_directory,
+    employee_rows_from_csv,
+    employee_rows_from_json,
+    fetch_employee_entries,
+    fetch_monthly_minutes,
+    fmt_hhmm,
+    get_engine,
+    import_employees,
+    import_time_entries,
+    mark_checkpoints_stale,
+    migrate,
+    minutes_from_entry,
+    month_bounds,
+    normalize_email,
+    rebuild_monthly_summary,
+    save_employee,
+    save_time_entry,
+    to_employee,
+    to_time_entry,
+    verify_monthly_summary,
+    year_bounds,
+)
+from jobs import JOB_POLL_INTERVAL, default_worker_name, work
+from models import (
+    Employee,
+    Job,
+    OvertimeCheckpoint,
+    PublicHoliday,
+)
+from overtime import close_year, recompute_checkpoints
+from seed import SEED_BATCH_SIZE, SeedResult, seed_database
+from statements import (
+    STATEMENT_CHUNK_SIZE,
+    STATEMENT_FORMATS,
+    StatementResult,
+    generate_statements,
+)
 
 CANCEL = object()
 console = Console(force_terminal=True, force_interactive=True)
 
-MONTH_EN = [
-    "",
-    "January",
-    "February",
-    "March",
-    "April",
-    "May",
-    "June",
-    "July",
-    "August",
-    "September",
-    "October",
-    "November",
-    "December",
-]
-
-
-def minutes_from_entry(e) -> int:
-    def to_min(t):
-        return t.hour * 60 + t.minute
-
-    start = to_min(e.Start)
-    end = to_min(e.Ende)
-    pause = to_min(e.Pause)
-    if end < start:
-        end += 24 * 60
-    return max(0, end - start - pause)
-
-
-def fmt_hhmm(mins: int) -> str:
-    return f"{mins // 60:02d}:{mins % 60:02d}"
-
-
-def get_engine():
-    db_url = os.getenv("DATABASE_URL", "sqlite:///app.db")
-    if db_url.startswith("postgres://"):
-        db_url = db_url.replace("postgres://", "postgresql+psycopg2://", 1)
-
-    connect_args = {}
-    if "DATABASE_URL" in os.environ:
-        connect_args = {"sslmode": "require"}
-
-    return create_engine(db_url, pool_pre_ping=True, connect_args=connect_args)
-
 
 def _parse_ddmmyyyy_loose(s: str) -> date:
     s = s.strip()
@@ -148,28 +152,6 @@ def prompt_break_minutes(label: str = "Break in (minutes): ") -> str | None:
         print("✗ Invalid value. Enter minutes as a non-negative integer (0–1440).")
 
 
-def normalize_email(raw: Optional[str]) -> Optional[str]:
-    if raw is None:
-        return None
-    s = raw.strip()
-    return s.lower() if s else None
-
-
-def calc_age(born: date, ref: date | None = None) -> int:
-    if ref is None:
-        ref = date.today()
-    years = ref.year - born.year
-    if (ref.month, ref.day) < (born.month, born.day):
-        years -= 1
-    return years
-
-
-def fetch_employees(s: Session) -> List["Employee"]:
-    return s.exec(
-        select(Employee).order_by(Employee.last_name, Employee.first_name)
-    ).all()
-
-
 def format_employee_row(e: "Employee", idx: int) -> str:
     email = e.email or "—"
     birth = e.birth_date.strftime("%d.%m.%Y") if e.birth_date else "—"
@@ -215,16 +197,6 @@ def prompt_keep_date(label: str, current: date | None) -> date | None | str:
             print("[red]✗[/red] Invalid date. Please use D.M.YYYY or D.M.YY.")
 
 
-@dataclass
-class EmployeePatch:
-    first_name: str | None = None
-    last_name: str | None = None
-    email: str | None = None
-    birth_date: date | None = None
-    hire_date: date | None = None
-    holidays: int | None = None
-
-
 def prompt_keep_int_nonneg(label: str, current: int) -> int | None:
     holiday_input = input(f"{label} [{current}] (Enter=keep, 0=Cancel): ").strip()
     if holiday_input == "0":
@@ -295,38 +267,6 @@ def collect_employee_patch_input(emp: Employee) -> EmployeePatch | None:
     return patch
 
 
-def apply_employee_patch(
-    s: Session, employee_id: int, patch: EmployeePatch
-) -> tuple[bool, str, Employee | None]:
-    emp = s.get(Employee, employee_id)
-    if not emp:
-        return False, "Employee not found.", None
-    if patch.first_name is not None:
-        emp.first_name = patch.first_name
-    if patch.last_name is not None:
-        emp.last_name = patch.last_name
-    if patch.email is not None:
-        emp.email = patch.email
-    if patch.birth_date is not None:
-        emp.birth_date = patch.birth_date
-    if patch.hire_date is not None:
-        emp.hire_date = patch.hire_date
-    if patch.holidays is not None:
-        emp.holidays = patch.holidays
-
-    try:
-        s.add(emp)
-        s.commit()
-        s.refresh(emp)
-        return True, "Employee updated.", emp
-    except IntegrityError:
-        s.rollback()
-        return False, "Email already in use (UNIQUE).", None
-    except SQLAlchemyError as e:
-        s.rollback()
-        return False, f"Database error: {e.__class__.__name__}.", None
-
-
 def update_employee_interactive(s: Session):
     emp = pick_employee(s, "Update employee – choose employee")
     if not emp:
@@ -348,7 +288,7 @@ def update_employee_interactive(s: Session):
 
 
 def pick_employee(s: Session, title: str = "Select employee") -> "Employee | None":
-    employees = fetch_employees(s)
+    employees = employee_directory.all(s)
     if not employees:
         print("✗ No employees in the database.")
         return None
@@ -394,42 +334,6 @@ def collect_employee_input() -> (
     return first, last, email, born, hire, holidays
 
 
-def to_employee(
-    first: str,
-    last: str,
-    email: Optional[str],
-    born: Optional[date],
-    hire: date,
-    holidays: int,
-) -> "Employee":
-    return Employee(
-        first_name=first,
-        last_name=last,
-        email=email,
-        birth_date=born,
-        hire_date=hire,
-        holidays=holidays,
-    )
-
-
-def save_employee(s: Session, emp: "Employee") -> bool:
-    try:
-        s.add(emp)
-        s.commit()
-        s.refresh(emp)
-        return True
-    except IntegrityError:
-        s.rollback()
-        return False
-
-
-def email_exists(s: Session, email: Optional[str]) -> bool:
-    if not email:
-        return False
-    q = select(Employee.id).where(Employee.email == email)
-    return s.exec(q).first() is not None
-
-
 def create_employee(s: Session) -> "Employee | None":
     data = collect_employee_input()
     if data is None:
@@ -488,33 +392,6 @@ def collect_time_entry_input() -> tuple[date, str, str, str] | None:
     return d, start, end, pause
 
 
-def to_time_entry(
-    employee_id: int, d: date, start: str, end: str, pause: str
-) -> "TimeEntry":
-    return TimeEntry.from_input(
-        Date=d.strftime("%d.%m.%Y"),
-        Start=start,
-        Ende=end,
-        Pause=pause,
-        employee_id=employee_id,
-    )
-
-
-def save_time_entry(s: Session, te: "TimeEntry") -> bool:
-    exists = s.exec(
-        select(TimeEntry).where(
-            TimeEntry.Date == te.Date,
-            TimeEntry.Start == te.Start,
-            TimeEntry.employee_id == te.employee_id,
-        )
-    ).first()
-    if exists:
-        return False
-    s.add(te)
-    s.commit()
-    return True
-
-
 def add_time_entry_interactive(s: Session):
     emp = pick_employee(s, "Record time – choose employee")
     if not emp:
@@ -558,22 +435,6 @@ def add_time_entry_interactive(s: Session):
         console.print("ⓘ [red]Similar entry already exists. No insert.[/red]")
 
 
-def fetch_employee_entries(s: Session, employee_id: int) -> List[TimeEntry]:
-    return s.exec(
-        select(TimeEntry)
-        .where(TimeEntry.employee_id == employee_id)
-        .options(selectinload(TimeEntry.employee))
-        .order_by(TimeEntry.Date, TimeEntry.Start)
-    ).all()
-
-
-def summarize_minutes_by_month(rows: list[TimeEntry]) -> dict[tuple[int, int], int]:
-    acc = Counter()
-    for r in rows:
-        acc[(r.Date.year, r.Date.month)] += minutes_from_entry(r)
-    return dict(acc)
-
-
 def prompt_month_choice(ym_list: List[Tuple[int, int]]) -> Tuple[int, int] | None:
     print("Available months:")
     print("[0] All months (monthly overview)")
@@ -596,8 +457,7 @@ def print_report_for_employee(s: Session):
     if not emp:
         return
 
-    rows = fetch_employee_entries(s, emp.id)
-    monthly_sum = summarize_minutes_by_month(rows)
+    monthly_sum = fetch_monthly_minutes(s, employee_id=emp.id).get(emp.id, {})
     ym_list = sorted(monthly_sum.keys())
 
     print("\nReport for:")
@@ -625,7 +485,7 @@ def print_report_for_employee(s: Session):
         return
 
     y, m = sel
-    month_rows = [r for r in rows if r.Date.year == y and r.Date.month == m]
+    month_rows = fetch_employee_entries(s, emp.id, *month_bounds(y, m))
 
     print(f"\nPeriod: {MONTH_EN[m]} {y}")
     if not month_rows:
@@ -644,38 +504,470 @@ def print_report_for_employee(s: Session):
     print(f"Sum (month): {fmt_hhmm(monthly_sum[(y, m)])}")
 
 
-def create_tables(engine):
-    SQLModel.metadata.create_all(engine)
+def run_import_entries(engine, args) -> int:
+    with open(args.path, newline="", encoding="utf-8-sig") as f, Session(engine) as s:
+        try:
+            result = import_time_entries(s, f, chunk_size=args.chunk_size)
+        except ValueError as e:
+            console.print(f"[red]✗ {e}[/red]")
+            return 1
+    for line_no, message in result.errors:
+        print(f"✗ Line {line_no}: {message}")
+    console.print(
+        f"[green]✓ Imported {result.created} entries[/green], "
+        f"{result.duplicates} duplicates skipped, {len(result.errors)} errors."
+    )
+    return 1 if result.errors else 0
+
 
+def run_import_employees(engine, args) -> int:
+    is_json = args.path.lower().endswith(".json")
+    label = "Item" if is_json else "Line"
+    with open(args.path, newline="", encoding="utf-8-sig") as f, Session(engine) as s:
+        try:
+            rows = (
+                employee_rows_from_json(json.load(f))
+                if is_json
+                else employee_rows_from_csv(f)
+            )
+            result = import_employees(
+                s, rows, chunk_size=args.chunk_size, dry_run=args.dry_run
+            )
+        except ValueError as e:
+            console.print(f"[red]✗ {e}[/red]")
+            return 1
+    for row_no, message in result.errors:
+        print(f"✗ {label} {row_no}: {message}")
+    if args.report:
+        with open(args.report, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([label.lower(), "error"])
+            writer.writerows(result.errors)
+    verb = "Would import" if result.dry_run else "Imported"
+    console.print(
+        f"[green]✓ {verb} {result.created} employees[/green], "
+        f"{len(result.errors)} errors."
+    )
+    return 1 if result.errors else 0
 
-def main():
-    engine = get_engine()
-    create_tables(engine)
 
+def run_holiday(engine, args) -> int:
     with Session(engine) as s:
-        while True:
-            console.print("\n--- [cyan]Menu[/cyan] ---")
-            console.print("[bold green]1)[/bold green] Create new employee")
-            console.print("[bold green]2)[/bold green] Update employee")
-            console.print("[bold green]3)[/bold green] Record time for employee")
-            console.print("[bold green]4)[/bold green] Show report")
-            console.print("[bold green]5)[/bold green] Exit")
-            choice = input("Choose [1-5]: ").strip()
-
-            if choice == "1":
-                create_employee(s)
-            elif choice == "2":
-                update_employee_interactive(s)
-            elif choice == "3":
-                add_time_entry_interactive(s)
-            elif choice == "4":
-                print_report_for_employee(s)
-            elif choice == "5":
-                console.print("[bold green]Bye![/bold green] Have a nice day!")
-                break
+        if args.action == "add":
+            s.merge(PublicHoliday(day=args.day, name=args.name))
+            mark_checkpoints_stale(s, args.day.year)
+            bump_data_version(s)
+            s.commit()
+            console.print(
+                f"[green]✓ Holiday saved[/green]: {args.day:%d.%m.%Y} {args.name}"
+            )
+            return 0
+
+        if args.action == "remove":
+            holiday = s.get(PublicHoliday, args.day)
+            if holiday is None:
+                print(f"✗ No holiday on {args.day:%d.%m.%Y}.")
+                return 1
+            s.delete(holiday)
+            mark_checkpoints_stale(s, args.day.year)
+            bump_data_version(s)
+            s.commit()
+            console.print(f"[green]✓ Holiday removed[/green]: {args.day:%d.%m.%Y}")
+            return 0
+
+        q = select(PublicHoliday).order_by(PublicHoliday.day)
+        if args.year is not None:
+            first, after_last = year_bounds(args.year)
+            q = q.where(PublicHoliday.day >= first, PublicHoliday.day < after_last)
+        for holiday in s.exec(q):
+            print(f"{holiday.day:%d.%m.%Y}  {holiday.name}")
+    return 0
+
+
+def run_overtime(engine, args) -> int:
+    with Session(engine) as s:
+        if args.action == "close":
+            try:
+                count = close_year(s, args.year)
+            except ValueError as e:
+                console.print(f"[red]✗ {e}[/red]")
+                return 1
+            console.print(
+                f"[green]✓ Closed {args.year}[/green]: {count} checkpoint(s) written."
+            )
+            return 0
+
+        if args.action == "recompute":
+            years = recompute_checkpoints(s, from_year=args.from_year)
+            if not years:
+                console.print("[green]✓ All checkpoints are up to date.[/green]")
             else:
-                print("Invalid choice.")
+                console.print(
+                    f"[green]✓ Recomputed[/green] {', '.join(map(str, years))}."
+                )
+            return 0
+
+        q = select(OvertimeCheckpoint).order_by(
+            OvertimeCheckpoint.employee_id, OvertimeCheckpoint.year
+        )
+        if args.year is not None:
+            q = q.where(OvertimeCheckpoint.year == args.year)
+        for c in s.exec(q):
+            sign = "-" if c.closing_minutes < 0 else "+"
+            print(
+                f"{c.employee_id:>6}  {c.year}  "
+                f"{sign}{fmt_hhmm(abs(c.closing_minutes))}"
+                f"{'  (stale)' if c.stale else ''}"
+            )
+    return 0
+
+
+def run_migrate(engine, args) -> int:
+    try:
+        result = migrate(engine, dedupe=args.dedupe)
+    except ValueError as e:
+        console.print(f"[red]✗ {e}[/red]")
+        return 1
+    for column in result["added_columns"]:
+        console.print(f"[green]✓ Added column[/green] {column}")
+    for index in result["created_indexes"]:
+        console.print(f"[green]✓ Created index[/green] {index}")
+    removed = result["removed_duplicates"]
+    if removed:
+        console.print(f"[yellow]ⓘ Removed {len(removed)} duplicate entries:[/yellow]")
+        writer = csv.writer(sys.stdout)
+        writer.writerow(["id", *ENTRY_CSV_COLUMNS])
+        for r in removed:
+            writer.writerow(
+                [
+                    r.id,
+                    r.employee_id,
+                    r.Date.isoformat(),
+                    f"{r.Start:%H:%M}",
+                    f"{r.Ende:%H:%M}",
+                    f"{r.Pause:%H:%M}",
+                ]
+            )
+    console.print(
+        f"[green]✓ Schema up to date[/green]: "
+        f"{result['backfilled_entries']} entries backfilled."
+    )
+    return 0
+
+
+def run_rebuild_summary(engine, args) -> int:
+    with Session(engine) as s:
+        if not args.verify:
+            rows = rebuild_monthly_summary(s)
+            console.print(f"[green]✓ Monthly summary rebuilt[/green]: {rows} rows.")
+            return 0
+
+        mismatches = verify_monthly_summary(s)
+    for (employee_id, y, m), stored, expected in mismatches:
+        print(
+            f"✗ Employee {employee_id}, {MONTH_EN[m]} {y}: "
+            f"stored {fmt_hhmm(stored[0])} in {stored[1]} entries, "
+            f"expected {fmt_hhmm(expected[0])} in {expected[1]} entries"
+        )
+    if mismatches:
+        print(f"{len(mismatches)} month(s) out of date. Run rebuild-summary.")
+        return 1
+    console.print("[green]✓ Monthly summary is up to date.[/green]")
+    return 0
+
+
+def run_seed(engine, args) -> int:
+    start = args.start or date(date.today().year - args.years, 1, 1)
+    end = args.end or date.today()
+    if end < start:
+        console.print("[red]✗ --end must not be before --start.[/red]")
+        return 1
+
+    t0 = time_module.perf_counter()
+
+    def progress(result: SeedResult) -> None:
+        rate = result.entries / (time_module.perf_counter() - t0)
+        console.print(f"  {result.entries:>12,} entries ({rate:,.0f}/s)", end="\r")
+
+    result = seed_database(
+        engine,
+        employees=args.employees,
+        start=start,
+        end=end,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        progress=progress,
+    )
+    console.print(
+        f"[green]✓ Seeded[/green] {result.employees:,} employees and "
+        f"{result.entries:,} entries ({start:%d.%m.%Y}–{end:%d.%m.%Y}) "
+        f"in {time_module.perf_counter() - t0:.1f}s."
+    )
+    return 0
+
+
+def run_report(engine, args) -> int:
+    if args.month is not None and not 1 <= args.month <= 12:
+        console.print("[red]✗ --month must be between 1 and 12.[/red]")
+        return 1
+    t0 = time_module.perf_counter()
+
+    def progress(result: StatementResult, total: int) -> None:
+        console.print(f"  {result.employees:>8,} / {total:,} employees", end="\r")
+
+    result = generate_statements(
+        engine,
+        year=args.year,
+        month=args.month,
+        out_dir=args.out,
+        fmt=args.format,
+        employee_ids=None if args.all else args.employee,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        progress=progress,
+    )
+    console.print(
+        f"[green]✓ Wrote {len(result.files):,} statements[/green] to {args.out} "
+        f"in {time_module.perf_counter() - t0:.1f}s."
+    )
+    return 0
+
+
+def run_worker(engine, args) -> int:
+    def report(job: Job) -> None:
+        if job.status == "done":
+            console.print(
+                f"[green]✓ Job {job.id}[/green] {job.kind} → {job.result_filename}"
+            )
+        else:
+            console.print(f"[red]✗ Job {job.id}[/red] {job.kind}: {job.error}")
+
+    console.print(f"Worker {args.name or default_worker_name()} waiting for jobs…")
+    try:
+        processed = work(
+            engine,
+            worker=args.name,
+            poll_interval=args.poll,
+            once=args.once,
+            on_job=report,
+        )
+    except KeyboardInterrupt:
+        return 0
+    console.print(f"Processed {processed} job(s).")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Timetracker CLI. Without a command the interactive menu starts.",
+    )
+    parser.set_defaults(ensure_schema=True)
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    rebuild = commands.add_parser(
+        "rebuild-summary", help="Regenerate monthly_summary from time_entry"
+    )
+    rebuild.add_argument(
+        "--verify",
+        action="store_true",
+        help="Only compare monthly_summary with time_entry, change nothing",
+    )
+    rebuild.set_defaults(handler=run_rebuild_summary)
+
+    migrate_cmd = commands.add_parser(
+        "migrate", help="Add missing columns/indexes and backfill net minutes"
+    )
+    migrate_cmd.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Delete duplicate entries that block the unique index "
+        "(keeps the oldest, prints the removed rows as CSV)",
+    )
+    migrate_cmd.set_defaults(handler=run_migrate, ensure_schema=False)
+
+    import_entries = commands.add_parser(
+        "import-entries",
+        help="Import time entries from CSV (employee_id,date,start,end,pause)",
+    )
+    import_entries.add_argument("path", help="CSV file to import")
+    import_entries.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help=f"Rows validated and written per transaction (default {IMPORT_CHUNK_SIZE})",
+    )
+    import_entries.set_defaults(handler=run_import_entries)
+
+    import_employees_cmd = commands.add_parser(
+        "import-employees",
+        help="Import employees from CSV or JSON "
+        "(first_name,last_name,hire_date[,email,birth_date,holidays,gender])",
+    )
+    import_employees_cmd.add_argument("path", help="CSV file, or .json array")
+    import_employees_cmd.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate and check emails, write nothing",
+    )
+    import_employees_cmd.add_argument(
+        "--report", help="Also write the per-row errors to this CSV file"
+    )
+    import_employees_cmd.add_argument(
+        "--chunk-size",
+        type=int,
+        default=IMPORT_CHUNK_SIZE,
+        help=f"Rows validated and written per transaction (default {IMPORT_CHUNK_SIZE})",
+    )
+    import_employees_cmd.set_defaults(handler=run_import_employees)
+
+    seed = commands.add_parser(
+        "seed", help="Generate synthetic employees and time entries for load tests"
+    )
+    seed.add_argument("--employees", type=int, default=100)
+    seed.add_argument(
+        "--years",
+        type=int,
+        default=3,
+        help="Start on 1 January this many years ago unless --start is given",
+    )
+    seed.add_argument("--start", type=_parse_ddmmyyyy_loose, help="D.M.YYYY")
+    seed.add_argument(
+        "--end", type=_parse_ddmmyyyy_loose, help="D.M.YYYY (default today)"
+    )
+    seed.add_argument("--seed", type=int, default=42, help="Random seed")
+    seed.add_argument(
+        "--batch-size",
+        type=int,
+        default=SEED_BATCH_SIZE,
+        help=f"Rows per INSERT batch and commit (default {SEED_BATCH_SIZE})",
+    )
+    seed.set_defaults(handler=run_seed)
+
+    report = commands.add_parser(
+        "report", help="Write statement files for many employees in parallel"
+    )
+    report.add_argument("--year", type=int, required=True)
+    report.add_argument("--month", type=int, help="1-12 (default: whole year)")
+    report_who = report.add_mutually_exclusive_group(required=True)
+    report_who.add_argument("--all", action="store_true", help="Every employee")
+    report_who.add_argument(
+        "--employee", type=int, action="append", help="Employee id (repeatable)"
+    )
+    report.add_argument("--out", required=True, help="Output directory")
+    report.add_argument("--format", choices=STATEMENT_FORMATS, default="txt")
+    report.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes (default: number of CPUs; 1 runs in-process)",
+    )
+    report.add_argument(
+        "--chunk-size",
+        type=int,
+        default=STATEMENT_CHUNK_SIZE,
+        help=f"Employees per worker task (default {STATEMENT_CHUNK_SIZE})",
+    )
+    report.set_defaults(handler=run_report)
+
+    worker = commands.add_parser(
+        "worker", help="Run queued background jobs (reports and exports)"
+    )
+    worker.add_argument(
+        "--once", action="store_true", help="Exit when the queue is empty"
+    )
+    worker.add_argument(
+        "--poll",
+        type=float,
+        default=JOB_POLL_INTERVAL,
+        help=f"Seconds between polls of an empty queue (default {JOB_POLL_INTERVAL:g})",
+    )
+    worker.add_argument("--name", help="Worker name stored on claimed jobs")
+    worker.set_defaults(handler=run_worker)
+
+    holiday = commands.add_parser(
+        "holiday", help="Manage public holidays excluded from target hours"
+    )
+    holiday.set_defaults(handler=run_holiday)
+    holiday_actions = holiday.add_subparsers(
+        dest="action", metavar="ACTION", required=True
+    )
+    holiday_add = holiday_actions.add_parser("add", help="Add or rename a holiday")
+    holiday_add.add_argument("day", type=_parse_ddmmyyyy_loose, help="D.M.YYYY")
+    holiday_add.add_argument("name")
+    holiday_remove = holiday_actions.add_parser("remove", help="Remove a holiday")
+    holiday_remove.add_argument("day", type=_parse_ddmmyyyy_loose, help="D.M.YYYY")
+    holiday_list = holiday_actions.add_parser("list", help="List holidays")
+    holiday_list.add_argument("--year", type=int)
+
+    overtime = commands.add_parser(
+        "overtime", help="Close years and maintain overtime carry-over checkpoints"
+    )
+    overtime.set_defaults(handler=run_overtime)
+    overtime_actions = overtime.add_subparsers(
+        dest="action", metavar="ACTION", required=True
+    )
+    overtime_close = overtime_actions.add_parser(
+        "close", help="Store closing balances for a finished year"
+    )
+    overtime_close.add_argument("year", type=int)
+    overtime_recompute = overtime_actions.add_parser(
+        "recompute", help="Re-close stale years after changes to old entries"
+    )
+    overtime_recompute.add_argument(
+        "--from-year",
+        type=int,
+        help="Re-close from this year on (default: the first stale year)",
+    )
+    overtime_list = overtime_actions.add_parser("list", help="List checkpoints")
+    overtime_list.add_argument("--year", type=int)
+
+    return parser
+
+
+def run_menu(s: Session):
+    while True:
+        console.print("\n--- [cyan]Menu[/cyan] ---")
+        console.print("[bold green]1)[/bold green] Create new employee")
+        console.print("[bold green]2)[/bold green] Update employee")
+        console.print("[bold green]3)[/bold green] Record time for employee")
+        console.print("[bold green]4)[/bold green] Show report")
+        console.print("[bold green]5)[/bold green] Exit")
+        choice = input("Choose [1-5]: ").strip()
+
+        if choice == "1":
+            create_employee(s)
+        elif choice == "2":
+            update_employee_interactive(s)
+        elif choice == "3":
+            add_time_entry_interactive(s)
+        elif choice == "4":
+            print_report_for_employee(s)
+        elif choice == "5":
+            console.print("[bold green]Bye![/bold green] Have a nice day!")
+            break
+        else:
+            print("Invalid choice.")
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    load_dotenv()
+    engine = get_engine()
+    if args.ensure_schema:
+        pending = create_tables(engine)
+        if pending:
+            console.print(
+                f"[yellow]ⓘ Database schema is behind ({', '.join(pending)}); "
+                "run `python main.py migrate`.[/yellow]"
+            )
+
+    if args.command is not None:
+        return args.handler(engine, args)
+
+    with Session(engine) as s:
+        run_menu(s)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
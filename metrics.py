@@ -0,0 +1,195 @@
+# Per-request metrics in Prometheus text format, without extra dependencies.
+#
+# Flask hooks time each request; SQLAlchemy cursor events (registered on the
+# Engine class, so every engine is covered) count statements and SQL time for
+# the request running in the current context. Everything is kept per process:
+# with several gunicorn workers each scrape sees the worker that answered it.
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from flask import Flask, Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+@dataclass
+class SqlStats:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_current_sql: ContextVar[SqlStats | None] = ContextVar("current_sql", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot: +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+HISTOGRAMS = {
+    "http_request_duration_seconds": (
+        "Request latency in seconds.",
+        LATENCY_BUCKETS,
+    ),
+    "http_request_sql_statements": (
+        "SQL statements executed per request.",
+        QUERY_COUNT_BUCKETS,
+    ),
+    "http_request_sql_duration_seconds": (
+        "Time spent in SQL per request, in seconds.",
+        LATENCY_BUCKETS,
+    ),
+}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, str], int] = {}
+        self._histograms: dict[str, dict[tuple[str, str], Histogram]] = {
+            name: {} for name in HISTOGRAMS
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            for per_endpoint in self._histograms.values():
+                per_endpoint.clear()
+
+    def observe(
+        self, endpoint: str, method: str, status: int, seconds: float, sql: SqlStats
+    ) -> None:
+        key = (endpoint, method)
+        values = {
+            "http_request_duration_seconds": seconds,
+            "http_request_sql_statements": sql.statements,
+            "http_request_sql_duration_seconds": sql.seconds,
+        }
+        with self._lock:
+            counter_key = (endpoint, method, str(status))
+            self._requests[counter_key] = self._requests.get(counter_key, 0) + 1
+            for name, value in values.items():
+                per_endpoint = self._histograms[name]
+                if key not in per_endpoint:
+                    per_endpoint[key] = Histogram(HISTOGRAMS[name][1])
+                per_endpoint[key].observe(value)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Requests handled, by endpoint and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                labels = _labels(endpoint=endpoint, method=method, status=status)
+                lines.append(f"http_requests_total{{{labels}}} {count}")
+            for name, (help_text, _buckets) in HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (endpoint, method), hist in sorted(self._histograms[name].items()):
+                    labels = _labels(endpoint=endpoint, method=method)
+                    lines.extend(hist.samples(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    stats = _current_sql.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += time.perf_counter() - started
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the next statement on this connection pops its own.
+    conn = context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+
+
+def init_app(app: Flask, token: str | None = None) -> None:
+    """Collect request metrics; serve them at /metrics only if token is set.
+
+    Scrapers must send `Authorization: Bearer <token>`. Without a token the
+    endpoint is not registered, so metrics are never public by accident.
+    """
+
+    # Streamed bodies (CSV exports) are produced after after_request, so their
+    # time and queries are not part of the request's numbers.
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql = SqlStats()
+        g.metrics_sql_token = _current_sql.set(g.metrics_sql)
+
+    @app.after_request
+    def record(response):
+        if "metrics_started" in g:
+            endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+            request_metrics.observe(
+                endpoint,
+                request.method,
+                response.status_code,
+                time.perf_counter() - g.metrics_started,
+                g.metrics_sql,
+            )
+        return response
+
+    @app.teardown_request
+    def stop_sql_tracking(exc):
+        sql_token = g.pop("metrics_sql_token", None)
+        if sql_token is not None:
+            _current_sql.reset(sql_token)
+
+    if not token:
+        return
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(
+            request_metrics.render(),
+            mimetype="text/plain; version=0.0.4; charset=utf-8",
+        )
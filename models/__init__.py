@@ -1,4 +1,20 @@
+from .data_version import DataVersion
 from .employee import Employee, Gender
-from .time_entry import TimeEntry
+from .job import Job, JobResult
+from .monthly_summary import MonthlySummary
+from .overtime_checkpoint import OvertimeCheckpoint
+from .public_holiday import PublicHoliday
+from .time_entry import TimeEntry, net_minutes_between
 
-__all__ = ["Employee", "Gender", "TimeEntry"]
+__all__ = [
+    "DataVersion",
+    "Employee",
+    "Gender",
+    "Job",
+    "JobResult",
+    "MonthlySummary",
+    "OvertimeCheckpoint",
+    "PublicHoliday",
+    "TimeEntry",
+    "net_minutes_between",
+]
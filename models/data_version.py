@@ -0,0 +1,19 @@
+# Code für the Data Version into DB
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class DataVersion(SQLModel, table=True):
+    """Single row bumped on every write that can change a report."""
+
+    __tablename__ = "data_version"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
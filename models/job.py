@@ -0,0 +1,50 @@
+# Code für Background Jobs into DB
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Index, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+def _utc_column(nullable: bool = True) -> Column:
+    return Column(DateTime(timezone=True), nullable=nullable)
+
+
+class Job(SQLModel, table=True):
+    """Long-running report/export work, picked up by `main.py worker`."""
+
+    __tablename__ = "job"
+    __table_args__ = (
+        # The worker's poll: oldest queued job first.
+        Index("ix_job_status_id", "status", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(max_length=50)
+    params: str = Field(default="{}", description="JSON-encoded arguments")
+    status: str = Field(default="queued", max_length=20)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=_utc_column(nullable=False),
+    )
+    started_at: Optional[datetime] = Field(default=None, sa_column=_utc_column())
+    finished_at: Optional[datetime] = Field(default=None, sa_column=_utc_column())
+    worker: Optional[str] = Field(default=None, max_length=100)
+    attempts: int = Field(default=0)
+    error: Optional[str] = Field(default=None)
+    result_filename: Optional[str] = Field(default=None, max_length=200)
+    result_mimetype: Optional[str] = Field(default=None, max_length=100)
+
+
+class JobResult(SQLModel, table=True):
+    """Output of a finished job, stored in the database so the web process can
+    serve files written by a worker on another machine (e.g. Heroku dynos).
+
+    Kept apart from Job so status polls do not load the file.
+    """
+
+    __tablename__ = "job_result"
+
+    job_id: int = Field(foreign_key="job.id", primary_key=True)
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
@@ -0,0 +1,13 @@
+# Code für Monthly Summaries into DB
+
+from sqlmodel import Field, SQLModel
+
+
+class MonthlySummary(SQLModel, table=True):
+    __tablename__ = "monthly_summary"
+
+    employee_id: int = Field(foreign_key="employee.id", primary_key=True)
+    year: int = Field(primary_key=True)
+    month: int = Field(primary_key=True)
+    net_minutes: int = Field(default=0, nullable=False)
+    entry_count: int = Field(default=0, nullable=False)
@@ -0,0 +1,28 @@
+# Code für Overtime Checkpoints into DB
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime
+from sqlmodel import Field, SQLModel
+
+
+class OvertimeCheckpoint(SQLModel, table=True):
+    """Closing overtime balance of an employee for a closed year.
+
+    closing_minutes already contains the previous year's closing balance, so
+    the current balance is the latest checkpoint plus the open year only.
+    """
+
+    __tablename__ = "overtime_checkpoint"
+
+    employee_id: int = Field(foreign_key="employee.id", primary_key=True)
+    year: int = Field(primary_key=True)
+    worked_minutes: int = Field(default=0, nullable=False)
+    target_minutes: int = Field(default=0, nullable=False)
+    closing_minutes: int = Field(default=0, nullable=False)
+    # Set when entries, holidays or the hire date of a closed year change.
+    stale: bool = Field(default=False, nullable=False)
+    closed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
@@ -0,0 +1,12 @@
+# Code für Public Holidays into DB
+
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+
+class PublicHoliday(SQLModel, table=True):
+    __tablename__ = "public_holiday"
+
+    day: date = Field(primary_key=True)
+    name: str = Field(min_length=1, max_length=100)
@@ -4,7 +4,7 @@ from datetime import date, datetime, time
 from typing import TYPE_CHECKING
 
 from pydantic import field_validator
-from sqlalchemy import Column
+from sqlalchemy import Column, Index, Integer
 from sqlalchemy import Date as SA_Date
 from sqlalchemy import Time as SA_Time
 from sqlmodel import Field, Relationship, SQLModel
@@ -13,16 +13,50 @@ if TYPE_CHECKING:
     from .employee import Employee
 
 
+def net_minutes_between(start: time, end: time, pause: time) -> int:
+    def to_min(t):
+        return t.hour * 60 + t.minute
+
+    start_min = to_min(start)
+    end_min = to_min(end)
+    if end_min < start_min:
+        end_min += 24 * 60
+    return max(0, end_min - start_min - to_min(pause))
+
+
+def _net_minutes_on_insert(context) -> int:
+    # Covers rows that skipped validation: plain TimeEntry(...) and core inserts.
+    params = context.get_current_parameters()
+    return net_minutes_between(params["Start"], params["Ende"], params["Pause"])
+
+
 class TimeEntry(SQLModel, table=True):
     __tablename__ = "time_entry"
+    __table_args__ = (
+        Index("ix_time_entry_Date_net_minutes", "Date", "net_minutes"),
+        Index(
+            "ix_time_entry_employee_id_Date_Start",
+            "employee_id",
+            "Date",
+            "Start",
+            unique=True,
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     Start: time = Field(sa_column=Column("Start", SA_Time, nullable=False))
     Ende: time = Field(sa_column=Column("Ende", SA_Time, nullable=False))
     Pause: time = Field(sa_column=Column("Pause", SA_Time, nullable=False))
     Date: date = Field(sa_column=Column("Date", SA_Date, nullable=False))
+    net_minutes: int | None = Field(
+        default=None,
+        sa_column=Column(
+            "net_minutes", Integer, nullable=True, default=_net_minutes_on_insert
+        ),
+        schema_extra={"validate_default": True},
+    )
 
-    employee_id: int = Field(foreign_key="employee.id", index=True)
+    employee_id: int = Field(foreign_key="employee.id")
     employee: "Employee" = Relationship(back_populates="time_entries")
 
     @field_validator("Start", "Ende", "Pause", mode="before")
@@ -61,6 +95,16 @@ class TimeEntry(SQLModel, table=True):
             return datetime.strptime(v, "%d.%m.%Y").date()
         raise TypeError("Date must be a date object or 'DD.MM.YYYY' string.")
 
+    @field_validator("net_minutes")
+    @classmethod
+    def compute_net_minutes(cls, v, info):
+        if v is not None:
+            return v
+        times = [info.data.get(name) for name in ("Start", "Ende", "Pause")]
+        if any(t is None for t in times):
+            return None
+        return net_minutes_between(*times)
+
     @classmethod
     def from_input(cls, **data) -> "TimeEntry":
         return cls.model_validate(data)
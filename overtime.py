@@ -0,0 +1,216 @@
+# Overtime balances with yearly checkpoints.
+#
+# Closing a year stores per employee the year's worked and target minutes and
+# the closing balance (previous closing balance + worked - target). A balance
+# in an open year is then one checkpoint row plus the monthly_summary rows of
+# the open years since, no matter how many years of history lie behind it.
+# Writes that touch a closed year flag its checkpoints (and all later ones) as
+# stale; recompute re-closes them in order.
+from datetime import date, datetime, timezone
+from typing import Iterable, Iterator
+
+from sqlmodel import Session, func, select
+
+from core import (
+    bump_data_version,
+    fetch_employees,
+    fetch_monthly_minutes,
+    last_due_month,
+    mark_checkpoints_stale,
+    upsert_insert,
+)
+from models import Employee, MonthlySummary, OvertimeCheckpoint
+from work_calendar import WorkCalendar, load_work_calendar
+
+
+def due_months(
+    work_cal: WorkCalendar,
+    year: int,
+    worked_by_month: dict[tuple[int, int], int],
+    hire_date: date,
+    through_month: int = 12,
+    today: date | None = None,
+) -> Iterator[tuple[int, int, int]]:
+    """(month, worked, target) for every due month of year up to through_month.
+
+    Months without entries count as 0 worked against the calendar target, so
+    report, statements, jobs and close_year all arrive at the same balance.
+    """
+    for month in range(1, min(through_month, last_due_month(year, today)) + 1):
+        worked = worked_by_month.get((year, month), 0)
+        yield month, worked, work_cal.target_minutes(year, month, hire_date=hire_date)
+
+
+def due_difference(
+    work_cal: WorkCalendar,
+    year: int,
+    worked_by_month: dict[tuple[int, int], int],
+    hire_date: date,
+    through_month: int = 12,
+    today: date | None = None,
+) -> int:
+    months = due_months(
+        work_cal, year, worked_by_month, hire_date, through_month, today=today
+    )
+    return sum(worked - target for _m, worked, target in months)
+
+
+def close_year(s: Session, year: int, today: date | None = None) -> int:
+    today = today or date.today()
+    if year >= today.year:
+        raise ValueError(f"{year} is not over yet.")
+
+    earlier = s.exec(
+        select(OvertimeCheckpoint.year)
+        .where(OvertimeCheckpoint.year < year)
+        .order_by(OvertimeCheckpoint.year.desc())
+        .limit(1)
+    ).first()
+    if earlier is not None and earlier != year - 1:
+        raise ValueError(f"Close {year - 1} first; the last closed year is {earlier}.")
+    if earlier is None:
+        # The first close starts the chain, so nothing may lie before it.
+        first_data = s.exec(select(func.min(MonthlySummary.year))).one()
+        if first_data is not None and first_data < year:
+            raise ValueError(
+                f"Close {first_data} first; entries start in {first_data}."
+            )
+
+    carry = {
+        c.employee_id: c.closing_minutes
+        for c in s.exec(
+            select(OvertimeCheckpoint).where(OvertimeCheckpoint.year == year - 1)
+        )
+    }
+    worked = fetch_monthly_minutes(s, year=year)
+    work_cal = load_work_calendar(s)
+    year_end = date(year, 12, 31)
+
+    rows = []
+    for emp in fetch_employees(s):
+        if emp.hire_date > year_end:
+            continue
+        months = list(
+            due_months(
+                work_cal, year, worked.get(emp.id, {}), emp.hire_date, today=today
+            )
+        )
+        worked_minutes = sum(w for _m, w, _t in months)
+        target_minutes = sum(t for _m, _w, t in months)
+        rows.append(
+            {
+                "employee_id": emp.id,
+                "year": year,
+                "worked_minutes": worked_minutes,
+                "target_minutes": target_minutes,
+                "closing_minutes": carry.get(emp.id, 0)
+                + worked_minutes
+                - target_minutes,
+                "stale": False,
+                "closed_at": datetime.now(timezone.utc),
+            }
+        )
+
+    if rows:
+        stmt = upsert_insert(s, OvertimeCheckpoint)
+        s.exec(
+            stmt.on_conflict_do_update(
+                index_elements=["employee_id", "year"],
+                set_={
+                    name: stmt.excluded[name]
+                    for name in (
+                        "worked_minutes",
+                        "target_minutes",
+                        "closing_minutes",
+                        "stale",
+                        "closed_at",
+                    )
+                },
+            ),
+            params=rows,
+        )
+    # A re-close changes the carry of every later checkpoint.
+    mark_checkpoints_stale(s, year + 1)
+    bump_data_version(s)
+    s.commit()
+    return len(rows)
+
+
+def closed_years(s: Session) -> list[int]:
+    return list(
+        s.exec(
+            select(OvertimeCheckpoint.year).distinct().order_by(OvertimeCheckpoint.year)
+        )
+    )
+
+
+def recompute_checkpoints(
+    s: Session, from_year: int | None = None, today: date | None = None
+) -> list[int]:
+    """Re-close closed years from from_year on (default: the first stale one)."""
+    if from_year is None:
+        from_year = s.exec(
+            select(OvertimeCheckpoint.year)
+            .where(OvertimeCheckpoint.stale)
+            .order_by(OvertimeCheckpoint.year)
+            .limit(1)
+        ).first()
+        if from_year is None:
+            return []
+    years = [y for y in closed_years(s) if y >= from_year]
+    for year in years:
+        close_year(s, year, today=today)
+    return years
+
+
+def fetch_carry_over(
+    s: Session, year: int, employee_ids: Iterable[int] | None = None
+) -> dict[int, tuple[int, bool]]:
+    """Balance at the end of year - 1 as {employee_id: (minutes, stale)}.
+
+    Starts from the last closed year before `year`; open years in between
+    (e.g. last year while it is not closed yet) are added from monthly_summary.
+    Empty while no earlier year is closed.
+    """
+    last_closed = s.exec(
+        select(func.max(OvertimeCheckpoint.year)).where(OvertimeCheckpoint.year < year)
+    ).one()
+    if last_closed is None:
+        return {}
+    ids = None if employee_ids is None else list(employee_ids)
+
+    q = select(
+        OvertimeCheckpoint.employee_id,
+        OvertimeCheckpoint.closing_minutes,
+        OvertimeCheckpoint.stale,
+    ).where(OvertimeCheckpoint.year == last_closed)
+    if ids is not None:
+        q = q.where(OvertimeCheckpoint.employee_id.in_(ids))
+    carry = {emp_id: (minutes, stale) for emp_id, minutes, stale in s.exec(q)}
+    if last_closed == year - 1:
+        return carry
+
+    gap = range(last_closed + 1, year)
+    worked_q = (
+        select(MonthlySummary.employee_id, func.sum(MonthlySummary.net_minutes))
+        .where(MonthlySummary.year >= gap.start, MonthlySummary.year < gap.stop)
+        .group_by(MonthlySummary.employee_id)
+    )
+    # Employees hired after the last closed year have no checkpoint yet.
+    staff_q = select(Employee.id, Employee.hire_date).where(
+        Employee.hire_date < date(year, 1, 1)
+    )
+    if ids is not None:
+        worked_q = worked_q.where(MonthlySummary.employee_id.in_(ids))
+        staff_q = staff_q.where(Employee.id.in_(ids))
+    worked = dict(s.exec(worked_q).all())
+    work_cal = load_work_calendar(s)
+    for emp_id, hire_date in s.exec(staff_q):
+        target = sum(
+            work_cal.target_minutes(y, month, hire_date=hire_date)
+            for y in gap
+            for month in range(1, 13)
+        )
+        minutes, stale = carry.get(emp_id, (0, False))
+        carry[emp_id] = (minutes + worked.get(emp_id, 0) - target, stale)
+    return carry
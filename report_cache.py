@@ -0,0 +1,91 @@
+# Rendered report pages shared by all gunicorn workers.
+#
+# Pages live in a small SQLite file next to (not inside) the app database, so
+# every worker process sees what another one rendered. Keys embed the data
+# version, which makes old pages unreachable after a write; the least
+# recently used entries are evicted once max_entries is exceeded.
+
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "timetracker_report_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 64
+
+
+class ReportCache:
+    def __init__(
+        self, path: str = DEFAULT_PATH, max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self._schema_ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call keeps the cache safe across forks and threads.
+        # The file and its schema appear on first use, not at app import.
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                yield conn
+        finally:
+            conn.close()
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS page ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_page_last_used ON page (last_used)")
+        self._schema_ready = True
+
+    def get(self, key: str) -> bytes | None:
+        if not self.enabled:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT body FROM page WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE page SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return row[0]
+
+    def put(self, key: str, body: bytes) -> None:
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO page (key, body, last_used) VALUES (?, ?, ?)",
+                (key, body, time.time()),
+            )
+            conn.execute(
+                "DELETE FROM page WHERE key IN ("
+                " SELECT key FROM page ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        if self.enabled:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM page")
+
+
+def report_cache_from_env() -> ReportCache:
+    return ReportCache(
+        path=os.getenv("REPORT_CACHE_PATH", DEFAULT_PATH),
+        max_entries=int(os.getenv("REPORT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+    )
@@ -0,0 +1,186 @@
+# Synthetic employees and time entries for production-sized local databases.
+#
+# Everything is generated as plain row dicts from a seeded RNG and written with
+# batched Core executemany inserts; no ORM objects are built per row. Shift
+# variants (start, end, pause, net minutes) are precomputed, so a row costs a
+# couple of random draws and one dict. monthly_summary is rebuilt once at the
+# end with a single INSERT ... SELECT.
+import random
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from typing import Iterator
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from core import rebuild_monthly_summary
+from models import Employee, Gender, TimeEntry, net_minutes_between
+
+SEED_BATCH_SIZE = 20_000
+
+FIRST_NAMES = [
+    "Anna", "Ben", "Clara", "David", "Elif", "Felix", "Greta", "Hannes", "Ida",
+    "Jonas", "Kira", "Leon", "Mara", "Niklas", "Olga", "Paul", "Rosa", "Sven",
+    "Tara", "Umut", "Vera", "Wim", "Yara", "Zoe",
+]  # fmt: skip
+LAST_NAMES = [
+    "Bauer", "Becker", "Fischer", "Hoffmann", "Koch", "Krüger", "Lange", "Meyer",
+    "Müller", "Neumann", "Richter", "Schäfer", "Schmidt", "Schneider", "Schulz",
+    "Wagner", "Weber", "Wolf", "Yilmaz", "Zimmermann",
+]  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Shift:
+    name: str
+    weight: int
+    starts: tuple[str, ...]  # HH:MM
+    lengths: tuple[int, ...]  # gross minutes incl. pause
+    pauses: tuple[int, ...]  # minutes
+    workdays: tuple[int, ...] = (0, 1, 2, 3, 4)
+
+
+SHIFTS = [
+    Shift("early", 3, ("05:45", "06:00", "06:15"), (480, 510, 525), (30, 45)),
+    Shift("day", 6, ("07:30", "08:00", "08:30", "09:00"), (480, 510, 540), (30, 60)),
+    Shift("late", 3, ("13:45", "14:00", "14:15"), (480, 510), (30, 45)),
+    # Starts in the evening and ends the next morning (Ende < Start).
+    Shift("night", 2, ("21:45", "22:00", "22:15"), (480, 510), (45, 60)),
+    Shift("part-time", 2, ("08:00", "09:00", "12:30"), (240, 300), (0, 15)),
+    Shift("weekend", 1, ("07:00", "10:00"), (360, 480), (30,), (4, 5, 6)),
+]
+# Share of scheduled days with an entry; the rest are vacation, sickness etc.
+ATTENDANCE = 0.92
+
+
+@dataclass
+class SeedResult:
+    employees: int = 0
+    entries: int = 0
+
+
+def _variants(shift: Shift) -> list[tuple[time, time, time, int]]:
+    variants = []
+    for raw_start in shift.starts:
+        h, m = map(int, raw_start.split(":"))
+        for length in shift.lengths:
+            for pause_min in shift.pauses:
+                start = time(h, m)
+                end_min = (h * 60 + m + length) % (24 * 60)
+                end = time(end_min // 60, end_min % 60)
+                pause = time(pause_min // 60, pause_min % 60)
+                variants.append(
+                    (start, end, pause, net_minutes_between(start, end, pause))
+                )
+    return variants
+
+
+def generate_employees(
+    rng: random.Random, count: int, start: date, first_number: int = 1
+) -> list[dict]:
+    # Emails are unique through the running number; dates are valid by
+    # construction: hire_date is at least 18 years after birth_date and before
+    # the start of the generated period.
+    umlauts = str.maketrans("äöü", "aou")
+    rows = []
+    for number in range(first_number, first_number + count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        birth = date(rng.randint(1960, start.year - 19), rng.randint(1, 12), 1)
+        birth += timedelta(days=rng.randrange(28))
+        earliest_hire = date(birth.year + 18, 1, 1)
+        hire = earliest_hire + timedelta(
+            days=rng.randrange(max(1, (start - earliest_hire).days))
+        )
+        local = f"{first}.{last}.{number}".lower().translate(umlauts)
+        rows.append(
+            {
+                "first_name": first,
+                "last_name": last,
+                "email": f"{local}@example.com",
+                "birth_date": birth,
+                "hire_date": hire,
+                "holidays": rng.choice((25, 28, 30)),
+                "gender": rng.choice(list(Gender)).name,
+            }
+        )
+    return rows
+
+
+def generate_entries(
+    rng: random.Random,
+    employee_ids: list[int],
+    start: date,
+    end: date,
+) -> Iterator[dict]:
+    shift_variants = [(s, _variants(s)) for s in SHIFTS]
+    weights = [s.weight for s in SHIFTS]
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+    for employee_id in employee_ids:
+        shift, variants = rng.choices(shift_variants, weights)[0]
+        workdays = set(shift.workdays)
+        for day in days:
+            if day.weekday() not in workdays or rng.random() > ATTENDANCE:
+                continue
+            start_t, end_t, pause, net = rng.choice(variants)
+            yield {
+                "employee_id": employee_id,
+                "Date": day,
+                "Start": start_t,
+                "Ende": end_t,
+                "Pause": pause,
+                "net_minutes": net,
+            }
+
+
+def seed_database(
+    engine,
+    employees: int,
+    start: date,
+    end: date,
+    seed: int = 42,
+    batch_size: int = SEED_BATCH_SIZE,
+    progress=None,
+) -> SeedResult:
+    rng = random.Random(seed)
+    result = SeedResult()
+    with Session(engine) as s:
+        # Numbering continues after existing rows so emails stay unique when
+        # seeding into the same database twice.
+        first_number = (s.exec(select(func.max(Employee.id))).one() or 0) + 1
+        employee_ids = []
+        for offset in range(0, employees, batch_size):
+            rows = generate_employees(
+                rng,
+                min(batch_size, employees - offset),
+                start=start,
+                first_number=first_number + offset,
+            )
+            employee_ids += s.exec(
+                insert(Employee.__table__).returning(
+                    Employee.__table__.c.id, sort_by_parameter_order=True
+                ),
+                params=rows,
+            ).scalars()
+        result.employees = len(employee_ids)
+        s.commit()
+
+        stmt = insert(TimeEntry.__table__)
+        batch = []
+        for row in generate_entries(rng, employee_ids, start, end):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                s.exec(stmt, params=batch)
+                s.commit()
+                result.entries += len(batch)
+                batch = []
+                if progress:
+                    progress(result)
+        if batch:
+            s.exec(stmt, params=batch)
+            s.commit()
+            result.entries += len(batch)
+
+        rebuild_monthly_summary(s)
+    return result
@@ -0,0 +1,246 @@
+# Month-end statements for many employees at once (`main.py report --all`).
+#
+# Employees are split into chunks; each chunk is one task for a process pool.
+# Workers open their own engine (connections must not cross a fork) and load
+# a chunk with a fixed number of queries: employees, monthly sums, entries of
+# the period and carry-over, each with an IN list. Files are rendered and
+# written in the worker, so the parent only collects counts for the progress
+# display and the work scales with the number of processes.
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlmodel import Session, select
+
+from core import (
+    ENTRY_ORDER,
+    MONTH_EN,
+    fetch_monthly_minutes,
+    fmt_hhmm,
+    get_engine,
+    minutes_from_entry,
+    month_bounds,
+    year_bounds,
+)
+from models import Employee, TimeEntry
+from overtime import due_difference, fetch_carry_over
+from work_calendar import load_work_calendar
+
+STATEMENT_FORMATS = ("txt", "csv", "html")
+STATEMENT_CHUNK_SIZE = 50
+STATEMENT_CSV_HEADER = ["date", "start", "end", "pause", "net_minutes"]
+
+_templates = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), "templates")),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_worker_engine = None
+
+
+@dataclass
+class StatementResult:
+    employees: int = 0
+    files: list[str] = field(default_factory=list)
+
+
+def _signed(minutes: int) -> str:
+    return f"{'-' if minutes < 0 else '+'}{fmt_hhmm(abs(minutes))}"
+
+
+def statement_filename(employee_id: int, year: int, month: int | None, fmt: str) -> str:
+    period = f"{year}-{month:02d}" if month else str(year)
+    return f"statement_{period}_employee-{employee_id}.{fmt}"
+
+
+def build_statements(
+    s: Session, employee_ids: list[int], year: int, month: int | None = None
+) -> list[dict]:
+    first, after_last = month_bounds(year, month) if month else year_bounds(year)
+    months = [month] if month else list(range(1, 13))
+    employees = s.exec(
+        select(Employee).where(Employee.id.in_(employee_ids)).order_by(Employee.id)
+    ).all()
+    minutes = fetch_monthly_minutes(s, year=year, employee_ids=employee_ids)
+    carry_over = fetch_carry_over(s, year, employee_ids)
+    work_cal = load_work_calendar(s)
+
+    entries: dict[int, list] = {}
+    for te in s.exec(
+        select(TimeEntry)
+        .where(
+            TimeEntry.employee_id.in_(employee_ids),
+            TimeEntry.Date >= first,
+            TimeEntry.Date < after_last,
+        )
+        .order_by(TimeEntry.employee_id, *ENTRY_ORDER)
+    ):
+        entries.setdefault(te.employee_id, []).append(te)
+
+    statements = []
+    for emp in employees:
+        worked_by_month = minutes.get(emp.id, {})
+
+        def worked_and_target(m: int) -> tuple[int, int]:
+            worked = worked_by_month.get((year, m), 0)
+            return worked, work_cal.target_minutes(year, m, hire_date=emp.hire_date)
+
+        month_rows = []
+        for m in months:
+            worked, target = worked_and_target(m)
+            month_rows.append(
+                {
+                    "label": f"{MONTH_EN[m]} {year}",
+                    "worked": fmt_hhmm(worked),
+                    "target": fmt_hhmm(target),
+                    "diff": _signed(worked - target),
+                    "worked_minutes": worked,
+                    "target_minutes": target,
+                }
+            )
+        # Running balance up to the end of the period, but not past today:
+        # carry-over plus every month of this year that is due.
+        carry, stale = carry_over.get(emp.id, (0, False))
+        year_to_date = due_difference(
+            work_cal, year, worked_by_month, emp.hire_date, through_month=months[-1]
+        )
+        worked_total = sum(r["worked_minutes"] for r in month_rows)
+        target_total = sum(r["target_minutes"] for r in month_rows)
+        statements.append(
+            {
+                "employee": emp,
+                "year": year,
+                "month": month,
+                "period": (
+                    f"{MONTH_EN[month]} {year}" if month else f"January–December {year}"
+                ),
+                "entries": [
+                    {
+                        "date": te.Date,
+                        "date_txt": f"{te.Date:%a %d.%m.%Y}",
+                        "start": f"{te.Start:%H:%M}",
+                        "end": f"{te.Ende:%H:%M}",
+                        "pause": f"{te.Pause:%H:%M}",
+                        "net_minutes": minutes_from_entry(te),
+                        "net": fmt_hhmm(minutes_from_entry(te)),
+                    }
+                    for te in entries.get(emp.id, [])
+                ],
+                "months": month_rows,
+                "worked": fmt_hhmm(worked_total),
+                "target": fmt_hhmm(target_total),
+                "diff": _signed(worked_total - target_total),
+                "carry_over": _signed(carry),
+                "balance": _signed(carry + year_to_date),
+                "balance_stale": stale,
+            }
+        )
+    return statements
+
+
+def render_statement(statement: dict, fmt: str) -> str:
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(STATEMENT_CSV_HEADER)
+        for e in statement["entries"]:
+            writer.writerow(
+                [
+                    e["date"].isoformat(),
+                    e["start"],
+                    e["end"],
+                    e["pause"],
+                    e["net_minutes"],
+                ]
+            )
+        return buf.getvalue()
+    return _templates.get_template(f"statement.{fmt}").render(**statement)
+
+
+def write_statements(
+    engine,
+    employee_ids: list[int],
+    year: int,
+    month: int | None,
+    fmt: str,
+    out_dir: str,
+) -> list[str]:
+    paths = []
+    with Session(engine) as s:
+        for statement in build_statements(s, employee_ids, year, month):
+            path = os.path.join(
+                out_dir,
+                statement_filename(statement["employee"].id, year, month, fmt),
+            )
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(render_statement(statement, fmt))
+            paths.append(path)
+    return paths
+
+
+def _init_worker() -> None:
+    global _worker_engine
+    _worker_engine = get_engine()
+
+
+def _write_chunk(employee_ids, year, month, fmt, out_dir) -> list[str]:
+    return write_statements(_worker_engine, employee_ids, year, month, fmt, out_dir)
+
+
+def generate_statements(
+    engine,
+    year: int,
+    month: int | None,
+    out_dir: str,
+    fmt: str = "txt",
+    employee_ids: list[int] | None = None,
+    workers: int | None = None,
+    chunk_size: int = STATEMENT_CHUNK_SIZE,
+    progress: Callable[[StatementResult, int], None] | None = None,
+) -> StatementResult:
+    """Write one statement file per employee; workers=1 runs in-process.
+
+    Pool workers connect through get_engine(), i.e. DATABASE_URL, so an
+    in-memory database only works with workers=1.
+    """
+    if fmt not in STATEMENT_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; use {', '.join(STATEMENT_FORMATS)}.")
+    if employee_ids is None:
+        with Session(engine) as s:
+            employee_ids = list(s.exec(select(Employee.id).order_by(Employee.id)))
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = [
+        employee_ids[i : i + chunk_size]
+        for i in range(0, len(employee_ids), chunk_size)
+    ]
+    result = StatementResult()
+    total = len(employee_ids)
+
+    def collect(paths: list[str]) -> None:
+        result.files += paths
+        result.employees += len(paths)
+        if progress:
+            progress(result, total)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(write_statements(engine, chunk, year, month, fmt, out_dir))
+        return result
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)), initializer=_init_worker
+    ) as pool:
+        futures = [
+            pool.submit(_write_chunk, chunk, year, month, fmt, out_dir)
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            collect(future.result())
+    result.files.sort()
+    return result
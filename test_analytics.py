@@ -0,0 +1,46 @@
+from datetime import date, time
+
+import pytest
+
+from core import fetch_employee_entries, summarize_minutes_by_month
+from models import net_minutes_between
+
+np = pytest.importorskip("numpy")
+analytics = pytest.importorskip("analytics")
+
+
+@pytest.mark.parametrize(
+    "start,end,pause",
+    [
+        (time(9, 0), time(17, 0), time(1, 0)),
+        (time(22, 0), time(6, 0), time(0, 30)),  # overnight
+        (time(10, 0), time(9, 0), time(1, 0)),  # 23h wrap
+        (time(9, 0), time(9, 10), time(0, 30)),  # clamps to 0
+        (time(0, 0), time(0, 0), time(0, 0)),
+    ],
+)
+def test_net_minutes_array_matches_model(start, end, pause):
+    def col(t):
+        return np.array([t.hour * 60 + t.minute])
+
+    net = analytics.net_minutes_array(col(start), col(end), col(pause))
+    assert net.tolist() == [net_minutes_between(start, end, pause)]
+
+
+def test_columnar_summary_matches_orm_summary(session, add_employee, add_entry):
+    emp = add_employee()
+    for d, start, end in [
+        (date(1969, 12, 31), time(8, 0), time(12, 0)),
+        (date(2024, 1, 31), time(22, 0), time(6, 0)),
+        (date(2024, 1, 2), time(9, 0), time(9, 5)),
+        (date(2024, 2, 29), time(7, 15), time(16, 40)),
+    ]:
+        add_entry(emp, d, start, end)
+
+    expected = summarize_minutes_by_month(fetch_employee_entries(session, emp.id))
+
+    assert analytics.summarize_minutes_by_month_columnar(session, emp.id) == expected
+    assert analytics.summarize_minutes_by_month_columnar(session, year=2024) == {
+        k: v for k, v in expected.items() if k[0] == 2024
+    }
+    assert analytics.summarize_minutes_by_month_columnar(session, year=1990) == {}
@@ -0,0 +1,385 @@
+import io
+from datetime import date, time
+
+import pytest
+from sqlalchemy import func, inspect, text
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine, select
+
+from core import (
+    EmployeeDirectory,
+    create_tables,
+    create_time_entries,
+    employee_directory,
+    employee_rows_from_csv,
+    employee_rows_from_json,
+    engine_options_from_env,
+    fetch_available_years,
+    fetch_employee_entries,
+    fetch_monthly_minutes,
+    get_engine,
+    import_employees,
+    import_time_entries,
+    last_due_month,
+    migrate,
+    minutes_from_entry,
+    rebuild_monthly_summary,
+    save_employee,
+    save_time_entry,
+    summarize_minutes_by_month,
+    verify_monthly_summary,
+)
+from models import Employee, Gender, MonthlySummary, TimeEntry
+
+
+@pytest.mark.parametrize(
+    "start,end,pause,expected",
+    [
+        (time(9, 0), time(17, 0), time(1, 0), 420),
+        (time(8, 30), time(16, 30), time(0, 30), 450),
+        (time(9, 15), time(17, 15), time(0, 45), 435),
+        (time(7, 0), time(15, 0), time(0, 0), 480),
+        (time(12, 0), time(20, 0), time(1, 30), 390),
+        (time(10, 0), time(9, 0), time(1, 0), 1320),  # 22 hours shift
+    ],
+)
+def test_minutes_from_entry(start, end, pause, expected):
+    entry = TimeEntry(Start=start, Ende=end, Pause=pause, Date=date.today())
+    assert minutes_from_entry(entry) == expected
+
+
+def test_employee_directory_caches_until_invalidated(
+    session, count_queries, add_employee
+):
+    ada = add_employee()
+    ada_id = ada.id
+
+    with count_queries() as queries:
+        assert [e.id for e in employee_directory.all(session)] == [ada_id]
+        assert employee_directory.get(session, ada_id).first_name == "Ada"
+        assert employee_directory.get(session, 999) is None
+    assert len(queries) == 1
+
+    grace = Employee(first_name="Grace", last_name="Hopper", hire_date=date(2021, 1, 1))
+    assert save_employee(session, grace)
+    with count_queries() as queries:
+        names = [e.first_name for e in employee_directory.all(session)]
+    assert names == ["Grace", "Ada"]
+    assert len(queries) == 1
+
+
+def test_employee_directory_expires_after_ttl(session, add_employee):
+    directory = EmployeeDirectory(ttl=0)
+    assert directory.all(session) == []
+    add_employee()
+    assert len(directory.all(session)) == 1
+
+
+def test_employee_directory_reads_ttl_from_env_lazily(monkeypatch):
+    directory = EmployeeDirectory()
+    monkeypatch.setenv("EMPLOYEE_CACHE_TTL", "5")  # e.g. load_dotenv() later
+    assert directory.ttl == 5
+    monkeypatch.delenv("EMPLOYEE_CACHE_TTL")
+    assert directory.ttl == 60
+
+
+def test_last_due_month():
+    today = date(2026, 3, 15)
+    assert [last_due_month(y, today) for y in (2025, 2026, 2027)] == [12, 3, 0]
+
+
+def test_fetch_monthly_minutes_matches_python_summary(session, add_employee, add_entry):
+    ada = add_employee()
+    bob = add_employee("Bob", "Builder")
+    add_entry(ada, date(2024, 1, 31), time(9, 0), time(17, 0))
+    add_entry(ada, date(2024, 1, 2), time(22, 0), time(6, 15))  # overnight
+    add_entry(ada, date(2024, 2, 1), time(9, 0), time(9, 10))  # clamps to 0
+    add_entry(ada, date(2025, 3, 3), time(8, 0), time(12, 0), time(0, 0))
+    add_entry(bob, date(2024, 2, 29), time(7, 45), time(16, 20))
+
+    aggregated = fetch_monthly_minutes(session)
+
+    for emp in (ada, bob):
+        expected = summarize_minutes_by_month(fetch_employee_entries(session, emp.id))
+        assert aggregated[emp.id] == expected
+
+
+def test_fetch_monthly_minutes_filters_year(session, add_employee, add_entry):
+    ada = add_employee()
+    add_entry(ada, date(2023, 12, 31), time(9, 0), time(17, 0))
+    add_entry(ada, date(2024, 1, 1), time(9, 0), time(17, 0))
+
+    assert fetch_monthly_minutes(session, year=2024) == {ada.id: {(2024, 1): 450}}
+
+
+def test_fetch_available_years(session, add_employee, add_entry):
+    assert fetch_available_years(session) == []
+    ada = add_employee()
+    for d in (date(2025, 6, 1), date(2021, 12, 31), date(2022, 1, 1), date(2025, 1, 1)):
+        add_entry(ada, d, time(9, 0), time(17, 0))
+
+    assert fetch_available_years(session) == [2021, 2022, 2025]
+
+
+def test_rebuild_monthly_summary_repairs_drift(session, add_employee, add_entry):
+    ada = add_employee()
+    add_entry(ada, date(2024, 5, 6), time(9, 0), time(17, 0))
+    add_entry(ada, date(2024, 5, 7), time(9, 0), time(13, 0), time(0, 0))
+    assert verify_monthly_summary(session) == []
+    assert session.get(MonthlySummary, (ada.id, 2024, 5)).entry_count == 2
+
+    session.add(
+        TimeEntry(
+            Date=date(2024, 6, 3),
+            Start=time(9, 0),
+            Ende=time(10, 0),
+            Pause=time(0, 0),
+            employee_id=ada.id,
+        )
+    )
+    session.commit()
+    assert verify_monthly_summary(session) == [((ada.id, 2024, 6), (0, 0), (60, 1))]
+
+    assert rebuild_monthly_summary(session) == 2
+    assert verify_monthly_summary(session) == []
+    assert fetch_monthly_minutes(session) == {ada.id: {(2024, 5): 690, (2024, 6): 60}}
+
+
+def test_time_entry_stores_net_minutes(session, add_employee):
+    ada = add_employee()
+    validated = TimeEntry.from_input(
+        Date="01.03.2024", Start="2200", Ende="06:00", Pause="0:30", employee_id=ada.id
+    )
+    assert validated.net_minutes == 450
+
+    plain = TimeEntry(
+        Date=date(2024, 3, 2),
+        Start=time(9, 0),
+        Ende=time(17, 0),
+        Pause=time(0, 30),
+        employee_id=ada.id,
+    )
+    session.add(plain)
+    session.commit()
+    session.refresh(plain)
+    assert plain.net_minutes == 450
+
+
+def test_save_time_entry_skips_duplicates(session, add_employee, add_entry):
+    ada = add_employee()
+    first = add_entry(ada, date(2024, 4, 2), time(9, 0), time(17, 0))
+    assert first.id is not None
+
+    again = TimeEntry(
+        Date=date(2024, 4, 2),
+        Start=time(9, 0),
+        Ende=time(18, 0),
+        Pause=time(0, 0),
+        employee_id=ada.id,
+    )
+    ada.holidays = 28  # unrelated pending change in the same session
+    assert save_time_entry(session, again) is False
+    assert again.id is None
+    session.commit()
+    session.expire_all()
+    assert session.get(Employee, ada.id).holidays == 28
+    assert len(fetch_employee_entries(session, ada.id)) == 1
+    assert session.get(MonthlySummary, (ada.id, 2024, 4)).entry_count == 1
+
+
+def test_migrate_upgrades_legacy_schema():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        for stmt in (
+            "CREATE TABLE employee (id INTEGER PRIMARY KEY, first_name VARCHAR(100) "
+            "NOT NULL, last_name VARCHAR(100) NOT NULL, email VARCHAR UNIQUE, "
+            "birth_date DATE, hire_date DATE NOT NULL, holidays INTEGER NOT NULL, "
+            "gender VARCHAR(7) NOT NULL)",
+            'CREATE TABLE time_entry (id INTEGER PRIMARY KEY, "Start" TIME NOT NULL, '
+            '"Ende" TIME NOT NULL, "Pause" TIME NOT NULL, "Date" DATE NOT NULL, '
+            "employee_id INTEGER NOT NULL REFERENCES employee (id))",
+            'CREATE INDEX "ix_time_entry_Date" ON time_entry ("Date")',
+            "INSERT INTO employee VALUES (1, 'A', 'B', NULL, NULL, '2020-01-01', 25, "
+            "'UNKNOWN')",
+            "INSERT INTO time_entry VALUES (1, '22:00:00.000000', '06:15:00.000000', "
+            "'00:30:00.000000', '2024-02-01', 1)",
+            "INSERT INTO time_entry VALUES (2, '22:00:00.000000', '07:00:00.000000', "
+            "'00:30:00.000000', '2024-02-01', 1)",
+        ):
+            conn.execute(text(stmt))
+
+    # Startup only reports what is pending and leaves the data to migrate.
+    assert create_tables(engine) == [
+        "time_entry.net_minutes",
+        "monthly_summary",
+        "ix_time_entry_employee_id_Date_Start",
+    ]
+    assert inspect(engine).get_table_names() == ["employee", "time_entry"]
+    with pytest.raises(ValueError, match="1 duplicate time entries"):
+        migrate(engine)
+    result = migrate(engine, dedupe=True)
+
+    assert result["added_columns"] == ["time_entry.net_minutes"]
+    assert result["backfilled_entries"] == 2
+    assert [(r.id, r.Ende) for r in result["removed_duplicates"]] == [(2, time(7, 0))]
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("time_entry")}
+    assert "ix_time_entry_Date_net_minutes" in indexes
+    assert "ix_time_entry_Date" not in indexes
+    with Session(engine) as s:
+        assert s.get(TimeEntry, 1).net_minutes == 465
+        assert s.get(TimeEntry, 2) is None
+        assert fetch_monthly_minutes(s) == {1: {(2024, 2): 465}}
+    assert migrate(engine)["removed_duplicates"] == []
+    assert create_tables(engine) == []
+
+
+def test_import_time_entries_reports_row_errors(session, add_employee, add_entry):
+    ada = add_employee()
+    add_entry(ada, date(2024, 1, 2), time(9, 0), time(17, 0))
+    csv_text = (
+        "Employee_ID, Date ,Start,End,Pause\n"
+        f"{ada.id},2024-01-02,09:00,17:00,30\n"  # already in the database
+        f"{ada.id},03.01.2024,0900,17:00,30\n"
+        f"{ada.id},2024-01-04,22:00,06:00,0:45\n"
+        f"{ada.id},2024-01-03,09:00,12:00,0\n"  # duplicate of line 3, next chunk
+        "999,2024-01-05,09:00,17:00,30\n"
+        f"{ada.id},2024-13-01,09:00,17:00,30\n"
+        f"{ada.id},2024-01-06,25:00,17:00,30\n"
+    )
+
+    result = import_time_entries(session, io.StringIO(csv_text), chunk_size=2)
+
+    assert (result.created, result.duplicates) == (2, 2)
+    assert [line for line, _msg in result.errors] == [6, 7, 8]
+    assert fetch_monthly_minutes(session) == {ada.id: {(2024, 1): 450 + 450 + 435}}
+    assert verify_monthly_summary(session) == []
+
+
+def test_import_skips_rows_inserted_after_the_probe(
+    session, monkeypatch, add_employee, add_entry
+):
+    import core
+
+    ada = add_employee()
+    add_entry(ada, date(2024, 1, 2), time(9, 0), time(17, 0))
+    # Another writer inserted the first row between probe and insert.
+    monkeypatch.setattr(core, "_existing_entry_keys", lambda s, rows: set())
+    csv_text = (
+        "employee_id,date,start,end,pause\n"
+        f"{ada.id},2024-01-02,09:00,17:00,30\n"
+        f"{ada.id},2024-01-03,09:00,17:00,30\n"
+    )
+
+    result = import_time_entries(session, io.StringIO(csv_text))
+
+    assert (result.created, result.duplicates) == (1, 1)
+    assert verify_monthly_summary(session) == []
+
+
+def test_batch_status_comes_from_the_insert(
+    session, monkeypatch, add_employee, add_entry
+):
+    import core
+
+    ada = add_employee()
+    add_entry(ada, date(2024, 1, 2), time(9, 0), time(17, 0))
+    monkeypatch.setattr(core, "_existing_entry_keys", lambda s, rows: set())
+    item = {"employee_id": ada.id, "start": "09:00", "end": "17:00", "pause": "30"}
+
+    results = create_time_entries(
+        session, [{**item, "date": "2024-01-02"}, {**item, "date": "2024-01-03"}]
+    )
+
+    assert [r["status"] for r in results] == ["duplicate", "created"]
+
+
+def test_import_time_entries_requires_columns(session):
+    with pytest.raises(ValueError, match="pause"):
+        import_time_entries(session, io.StringIO("employee_id,date,start,end\n"))
+
+
+def test_import_employees_checks_emails_per_chunk(session, count_queries, add_employee):
+    add_employee(email="ada@example.com")
+    csv_text = (
+        "First_Name,Last_Name,Email,Birth_Date,Hire_Date,Holidays,Gender\n"
+        "Alan,Turing, Alan@Example.com ,1912-06-23,01.01.2020,28,male\n"
+        "Ada,Again,ADA@example.com,,2020-01-01,,\n"  # already in the database
+        "Grace,Hopper,alan@example.com,,2020-01-01,,\n"  # duplicate of line 2
+        "Kid,Test,,2010-01-01,2009-12-31,,\n"  # hired before birth
+        "No,Mail,not-an-email,,2020-01-01,,\n"
+        "Missing,Hire,,,,,\n"
+        "Edsger,Dijkstra,,,2021-03-01,30,\n"
+    )
+
+    dry = import_employees(
+        session, employee_rows_from_csv(io.StringIO(csv_text)), dry_run=True
+    )
+    assert (dry.created, dry.dry_run) == (2, True)
+    assert session.exec(select(func.count()).select_from(Employee)).one() == 1
+
+    with count_queries() as statements:
+        result = import_employees(
+            session, employee_rows_from_csv(io.StringIO(csv_text)), chunk_size=4
+        )
+    email_probes = [q for q in statements if "SELECT employee.email" in q]
+    assert len(email_probes) <= 2  # at most one per chunk, not one per row
+
+    assert result.created == 2
+    assert result.errors == dry.errors
+    assert [line for line, _msg in result.errors] == [3, 4, 5, 6, 7]
+    assert "already in use" in result.errors[0][1]
+    assert "line 2" not in result.errors[1][1] and "row 2" in result.errors[1][1]
+    assert "hire date" in result.errors[2][1]
+    alan = session.exec(select(Employee).where(Employee.last_name == "Turing")).one()
+    assert (alan.email, alan.holidays, alan.gender) == (
+        "alan@example.com",
+        28,
+        Gender.MALE,
+    )
+
+
+def test_import_employees_from_json(session):
+    rows = employee_rows_from_json(
+        {
+            "employees": [
+                {"first_name": "Ada", "last_name": "L", "hire_date": "2020-01-01"},
+                "not an object",
+            ]
+        }
+    )
+    result = import_employees(session, rows)
+    assert result.created == 1
+    assert result.errors == [(2, "Employee must be an object.")]
+    with pytest.raises(ValueError):
+        list(employee_rows_from_json({"people": []}))
+
+
+def test_get_engine_applies_sqlite_pragmas(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'tuned.db'}")
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "off")
+    engine = get_engine()
+    try:
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        assert engine.pool.size() == 3
+        assert engine.pool._pre_ping is False
+    finally:
+        engine.dispose()
+
+    monkeypatch.setenv("SQLITE_PERFORMANCE", "0")
+    engine = get_engine()
+    try:
+        with engine.connect() as conn:
+            # WAL is persistent in the file; synchronous falls back to FULL.
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2
+    finally:
+        engine.dispose()
+
+
+def test_engine_options_only_use_sslmode_for_postgres(monkeypatch):
+    monkeypatch.delenv("DATABASE_SSLMODE", raising=False)
+    assert engine_options_from_env("sqlite:///x.db")["connect_args"] == {}
+    options = engine_options_from_env("postgresql+psycopg2://u@h/db")
+    assert options["connect_args"] == {"sslmode": "require"}
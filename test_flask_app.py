@@ -0,0 +1,293 @@
+import io
+import re
+from datetime import date, time
+
+from sqlalchemy import inspect
+from sqlmodel import create_engine
+
+from benchmarks.bench_import import CLI_ONLY_MODULES, measure_import
+from core import employee_directory, fetch_employee_entries
+from models import PublicHoliday
+from report_cache import ReportCache
+
+
+def test_import_time_upload(client, session, add_employee):
+    ada = add_employee()
+    csv_bytes = (
+        "employee_id,date,start,end,pause\n"
+        f"{ada.id},2024-05-02,08:00,16:30,30\n"
+        f"{ada.id},2024-05-03,later,16:30,30\n"
+    ).encode()
+
+    resp = client.post(
+        "/time/import",
+        data={"file": (io.BytesIO(csv_bytes), "entries.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert resp.status_code == 200
+    assert resp.json["created"] == 1
+    assert resp.json["error_count"] == 1
+    assert resp.json["errors"][0]["line"] == 3
+    assert len(fetch_employee_entries(session, ada.id)) == 1
+
+
+def test_export_streams_csv(client, add_employee, add_entry):
+    ada = add_employee()
+    bob = add_employee("Bob", "Builder")
+    add_entry(ada, date(2023, 12, 29))
+    add_entry(ada, date(2024, 1, 3), time(22, 0), time(6, 0))
+    add_entry(bob, date(2024, 1, 4))
+
+    resp = client.get("/export/entries.csv?year=2024")
+    assert resp.is_streamed
+    assert resp.mimetype == "text/csv"
+    assert "time_entries_2024.csv" in resp.headers["Content-Disposition"]
+    assert resp.get_data(as_text=True).splitlines() == [
+        "employee_id,first_name,last_name,date,start,end,pause,net_minutes",
+        f"{ada.id},Ada,Lovelace,2024-01-03,22:00,06:00,00:30,450",
+        f"{bob.id},Bob,Builder,2024-01-04,09:00,17:00,00:30,450",
+    ]
+
+    resp = client.get(f"/export/summary.csv?employee_id={ada.id}")
+    assert resp.get_data(as_text=True).splitlines() == [
+        "employee_id,first_name,last_name,year,month,net_minutes,entry_count",
+        f"{ada.id},Ada,Lovelace,2023,12,450,1",
+        f"{ada.id},Ada,Lovelace,2024,1,450,1",
+    ]
+
+
+def test_report_targets_use_holidays_and_hire_date(
+    client, session, add_employee, add_entry
+):
+    ada = add_employee(hire_date=date(2024, 3, 15))
+    session.add(PublicHoliday(day=date(2024, 3, 29), name="Good Friday"))
+    session.commit()
+    add_entry(ada, date(2024, 3, 18))
+
+    html = client.get("/report?year=2024").get_data(as_text=True)
+
+    # 15.-28.3.2024 has 10 workdays once Good Friday is excluded.
+    assert '<span class="soll">80,0</span>' in html
+    assert '<span class="ist">7,5</span>' in html
+
+
+def test_report_revalidates_with_etag(client, add_employee, add_entry):
+    ada = add_employee()
+    add_entry(ada, date(2024, 3, 18))
+
+    first = client.get("/report?year=2024")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    cached = client.get("/report?year=2024", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    add_entry(ada, date(2024, 3, 19))
+    fresh = client.get("/report?year=2024", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert '<span class="ist">15,0</span>' in fresh.get_data(as_text=True)
+
+
+def test_report_cards_paginate_by_keyset(client, monkeypatch, add_employee, add_entry):
+    import flask_app
+
+    monkeypatch.setattr(flask_app, "REPORT_PAGE_SIZE", 2)
+    for first, last in [("Ada", "Lovelace"), ("Alan", "Turing"), ("Grace", "Hopper")]:
+        emp = add_employee(first=first, last=last)
+        add_entry(emp, date(2024, 3, 18))
+
+    html = client.get("/report?year=2024").get_data(as_text=True)
+    assert "Grace Hopper" in html and "Ada Lovelace" in html
+    assert "Alan Turing" not in html
+
+    cursor = re.search(r'data-next-cursor="([^"]+)"', html).group(1)
+    page = client.get(f"/report/cards?year=2024&cursor={cursor}").get_json()
+    assert [card["name"] for card in page["cards"]] == ["Alan Turing"]
+    assert page["cards"][0]["months"][0]["current_txt"] == "7,5"
+    assert page["next_cursor"] is None
+
+    assert client.get("/report/cards?cursor=bogus").status_code == 400
+
+
+def test_month_drill_down_pages_entries_by_keyset(
+    client, monkeypatch, add_employee, add_entry
+):
+    import flask_app
+
+    monkeypatch.setattr(flask_app, "ENTRY_PAGE_SIZE", 2)
+    ada = add_employee()
+    add_entry(ada, date(2024, 2, 29))
+    add_entry(ada, date(2024, 3, 4))
+    add_entry(ada, date(2024, 3, 5), start=time(7, 0), end=time(15, 0))
+    add_entry(ada, date(2024, 3, 5), start=time(18, 0), end=time(20, 0))
+    add_entry(ada, date(2024, 4, 1))
+
+    html = client.get(f"/report/employee/{ada.id}?year=2024&month=3")
+    assert html.status_code == 200
+    body = html.get_data(as_text=True)
+    assert "March 2024" in body and "29.02.2024" not in body
+    assert "Mon 04.03.2024" in body and "18:00" not in body
+    assert "<strong>3</strong>" in body  # entries in March, not just this page
+
+    cursor = re.search(r'data-next-cursor="([^"]+)"', body).group(1)
+    page = client.get(
+        f"/report/employee/{ada.id}/entries?from=2024-03-01&to=2024-03-31"
+        f"&cursor={cursor}"
+    ).get_json()
+    assert [(e["date"], e["start"]) for e in page["entries"]] == [
+        ("2024-03-05", "18:00")
+    ]
+    assert page["entries"][0]["net_txt"] == "01:30"
+    assert page["next_cursor"] is None
+
+    assert client.get(f"/report/employee/{ada.id}/entries?month=13").status_code == 400
+    assert (
+        client.get(f"/report/employee/{ada.id}/entries?from=2024-03-01").status_code
+        == 400
+    )
+    assert client.get(f"/report/employee/{ada.id}/entries?cursor=x").status_code == 400
+    assert client.get("/report/employee/999?year=2024&month=3").status_code == 404
+
+
+def test_api_creates_time_entries_in_batch(client, session, add_employee, add_entry):
+    ada = add_employee()
+    add_entry(ada, date(2024, 3, 18))
+
+    resp = client.post(
+        "/api/time-entries",
+        json=[
+            {
+                "employee_id": ada.id,
+                "date": "2024-03-19",
+                "start": "09:00",
+                "end": "17:00",
+                "pause": 30,
+            },
+            {
+                "employee_id": ada.id,
+                "date": "18.03.2024",
+                "start": "9:00",
+                "end": "17:00",
+                "pause": "00:30",
+            },
+            {
+                "employee_id": ada.id,
+                "date": "2024-03-19",
+                "start": "09:00",
+                "end": "12:00",
+            },
+            {
+                "employee_id": 999,
+                "date": "2024-03-20",
+                "start": "09:00",
+                "end": "17:00",
+            },
+            {
+                "employee_id": ada.id,
+                "date": "2024-03-20",
+                "start": "nine",
+                "end": "17:00",
+            },
+        ],
+    )
+
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert (body["created"], body["duplicates"], body["invalid"]) == (1, 2, 2)
+    assert [r["status"] for r in body["results"]] == [
+        "created",
+        "duplicate",
+        "duplicate",
+        "invalid",
+        "invalid",
+    ]
+    assert body["results"][3]["error"] == "Unknown employee 999."
+    assert len(fetch_employee_entries(session, ada.id)) == 2
+
+    assert client.post("/api/time-entries", json={"x": 1}).status_code == 400
+
+
+def test_add_time_accepts_employee_missing_from_directory(
+    client, session, add_employee
+):
+    assert client.get("/time/record").status_code == 200  # directory loaded
+    grace = add_employee("Grace", "Hopper")  # e.g. by another worker
+
+    resp = client.post(
+        "/add_time",
+        data={
+            "employee": grace.id,
+            "date": "2024-04-02",
+            "start": "09:00",
+            "end": "17:00",
+            "pause": "30",
+        },
+    )
+
+    page = resp.get_data(as_text=True)
+    assert "Time successfully added!" in page
+    assert "Grace" in page
+    assert len(fetch_employee_entries(session, grace.id)) == 1
+
+
+def test_importing_app_has_no_side_effects():
+    result = measure_import("flask_app")
+    assert not set(CLI_ONLY_MODULES) & set(result["modules"])
+    assert result["created_files"] == []
+
+
+def test_init_db_command_creates_tables(tmp_path, monkeypatch):
+    import flask_app
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    monkeypatch.setattr(flask_app, "engine", engine)
+    result = flask_app.app.test_cli_runner().invoke(args=["init-db"])
+    assert result.exit_code == 0, result.output
+    assert "time_entry" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+# Statements per request. These must not depend on headcount: a query per
+# employee (N+1) shows up as a growing count between the two sizes below.
+REPORT_QUERY_BUDGET = 7  # version, 2x year scan, page, sums, carry-over, holidays
+TIME_RECORD_QUERY_BUDGET = 1  # employee directory (cold)
+ADD_TIME_QUERY_BUDGET = 4  # insert, summary upsert, stale checkpoints, version
+
+
+def test_query_budgets_do_not_grow_with_headcount(
+    client, count_queries, query_budget, monkeypatch, add_employee, add_entry
+):
+    import flask_app
+
+    monkeypatch.setattr(flask_app, "report_cache", ReportCache(max_entries=0))
+    counts = []
+    staff = []
+    for headcount in (2, 30):
+        while len(staff) < headcount:
+            emp = add_employee(first=f"E{len(staff)}", last=f"L{len(staff)}")
+            add_entry(emp, date(2024, 3, 18))
+            staff.append(emp.id)
+        employee_directory.invalidate()
+
+        with query_budget(REPORT_QUERY_BUDGET) as report_queries:
+            assert client.get("/report?year=2024").status_code == 200
+        with query_budget(TIME_RECORD_QUERY_BUDGET) as record_queries:
+            assert client.get("/time/record").status_code == 200
+        with query_budget(ADD_TIME_QUERY_BUDGET) as add_queries:
+            resp = client.post(
+                "/add_time",
+                data={
+                    "employee": staff[-1],
+                    "date": f"2024-04-{headcount:02d}",
+                    "start": "09:00",
+                    "end": "17:00",
+                    "pause": "30",
+                },
+            )
+            assert "Time successfully added!" in resp.get_data(as_text=True)
+        counts.append((len(report_queries), len(record_queries), len(add_queries)))
+
+    assert counts[0] == counts[1]
@@ -0,0 +1,113 @@
+import json
+from datetime import date
+
+import pytest
+
+from jobs import (
+    JOB_MAX_ATTEMPTS,
+    claim_next_job,
+    finish_job,
+    parse_job_params,
+    run_job,
+    submit_job,
+    work,
+)
+from models import Job, JobResult
+
+
+@pytest.fixture
+def ada(add_employee, add_entry):
+    emp = add_employee(hire_date=date(2024, 3, 1))
+    add_entry(emp, date(2024, 3, 18))
+    return emp
+
+
+def test_parse_job_params_validates():
+    assert parse_job_params("entries_export", {"year": "2024"}) == {"year": 2024}
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        parse_job_params("nope", {})
+    with pytest.raises(ValueError, match="required"):
+        parse_job_params("yearly_statement", {})
+    with pytest.raises(ValueError, match="Unknown parameter"):
+        parse_job_params("yearly_statement", {"year": 2024, "x": 1})
+
+
+def test_worker_runs_queued_jobs(engine, session, ada):
+    statement = submit_job(session, "yearly_statement", {"year": 2024})
+    broken = Job(kind="yearly_statement", params=json.dumps({"month": 1}))
+    session.add(broken)
+    session.commit()
+
+    assert work(engine, worker="test", once=True) == 2
+    session.expire_all()
+
+    done = session.get(Job, statement.id)
+    assert (done.status, done.worker) == ("done", "test")
+    lines = session.get(JobResult, done.id).data.decode("utf-8").splitlines()
+    assert lines[0].startswith("employee_id,first_name,last_name,year,month")
+    # March 2024 from the 1st: 21 workdays x 8h target, one 7.5h day worked.
+    assert f"{ada.id},Ada,Lovelace,2024,3,450,10080,-9630,-9630" in lines
+    assert len(lines) == 1 + 12
+
+    failed = session.get(Job, broken.id)
+    assert failed.status == "failed"
+    assert "month" in failed.error
+    assert session.get(JobResult, broken.id) is None
+    assert claim_next_job(session, "test") is None
+
+
+def test_job_timeout_is_read_from_env_per_claim(session, ada, monkeypatch):
+    job = submit_job(session, "entries_export", {"year": 2024})
+    claim_next_job(session, "dead")
+    monkeypatch.setenv("JOB_TIMEOUT", "-1")  # e.g. load_dotenv() after import
+
+    claimed = claim_next_job(session, "next")
+    assert (claimed.id, claimed.worker) == (job.id, "next")
+
+
+def test_jobs_of_dead_workers_are_requeued_then_failed(engine, session, ada):
+    job = submit_job(session, "entries_export", {"year": 2024})
+    assert claim_next_job(session, "dead").worker == "dead"
+    assert claim_next_job(session, "alive") is None  # still within the timeout
+
+    for attempt in range(2, JOB_MAX_ATTEMPTS + 1):
+        claimed = claim_next_job(session, f"worker-{attempt}", timeout=-1)
+        assert (claimed.id, claimed.attempts) == (job.id, attempt)
+
+    # The first worker shows up late: its outcome no longer counts.
+    session.expunge(claimed)
+    result = run_job(engine, claimed)
+    assert not finish_job(session, claimed, "dead", result)
+    assert session.get(JobResult, job.id) is None
+
+    assert claim_next_job(session, "last", timeout=-1) is None
+    session.expire_all()
+    failed = session.get(Job, job.id)
+    assert failed.status == "failed"
+    assert "stopped responding" in failed.error
+
+
+def test_job_endpoints(client, engine, ada):
+    resp = client.post(
+        "/jobs", json={"kind": "entries_export", "params": {"year": 2024}}
+    )
+    assert resp.status_code == 202
+    status_url = resp.headers["Location"]
+    assert client.get(status_url).get_json()["status"] == "queued"
+    assert client.get(f"{status_url}/result").status_code == 409
+
+    work(engine, once=True)
+
+    status = client.get(status_url).get_json()
+    assert status["status"] == "done"
+    result = client.get(status["result_url"])
+    assert result.status_code == 200
+    assert "time_entries_2024.csv" in result.headers["Content-Disposition"]
+    assert (
+        result.get_data(as_text=True)
+        .splitlines()[1]
+        .endswith("2024-03-18,09:00,17:00,00:30,450")
+    )
+
+    assert client.post("/jobs", json={"kind": "nope"}).status_code == 400
+    assert client.get("/jobs/999").status_code == 404
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from metrics import Histogram, init_app, request_metrics
+
+
+def sample(text, name, **labels):
+    label_re = ".*".join(f'{k}="{re.escape(v)}"' for k, v in labels.items())
+    match = re.search(rf"^{name}\{{.*{label_re}.*\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram((1, 5))
+    for value in (0, 1, 3, 7):
+        hist.observe(value)
+    lines = hist.samples("q", 'endpoint="/x"')
+    assert lines[:3] == [
+        'q_bucket{endpoint="/x",le="1"} 2',
+        'q_bucket{endpoint="/x",le="5"} 3',
+        'q_bucket{endpoint="/x",le="+Inf"} 4',
+    ]
+    assert lines[-1] == 'q_count{endpoint="/x"} 4'
+
+
+def test_metrics_count_requests_and_sql(client):
+    request_metrics.reset()
+    client.get("/report?year=2024")
+    client.get("/report?year=2024")
+
+    assert client.get("/metrics").status_code == 404  # no METRICS_TOKEN
+    text = request_metrics.render()
+    assert sample(text, "http_requests_total", endpoint="/report", status="200") == 2
+    assert sample(text, "http_request_duration_seconds_count", endpoint="/report") == 2
+    statements = sample(text, "http_request_sql_statements_sum", endpoint="/report")
+    assert statements >= 2  # at least the data version lookup per request
+    assert sample(text, "http_request_sql_duration_seconds_sum", endpoint="/report")
+
+
+def test_metrics_token():
+    app = Flask(__name__)
+    init_app(app, token="s3cret")
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert "# TYPE http_request_sql_statements histogram" in resp.get_data(as_text=True)
+
+
+def test_failed_statement_does_not_shift_query_timings(engine):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        assert conn.info["metrics_query_start"] == []
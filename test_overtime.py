@@ -0,0 +1,145 @@
+from datetime import date, time
+
+import pytest
+from sqlmodel import select
+
+from core import fmt_hhmm
+from flask_app import mins_to_hours_txt
+from models import OvertimeCheckpoint
+from overtime import close_year, fetch_carry_over, recompute_checkpoints
+from statements import build_statements
+from work_calendar import WorkCalendar
+
+TODAY = date(2026, 3, 1)
+HIRED = date(2024, 12, 2)
+
+
+def hours(minutes) -> str:
+    return mins_to_hours_txt(abs(minutes))
+
+
+def year_target(year, hire_date) -> int:
+    cal = WorkCalendar()
+    return sum(cal.target_minutes(year, m, hire_date=hire_date) for m in range(1, 13))
+
+
+def test_close_year_carries_balance_into_next_year(session, add_employee, add_entry):
+    emp = add_employee(hire_date=HIRED)
+    add_entry(emp, date(2024, 12, 2))
+    add_entry(emp, date(2025, 3, 3), end=time(19, 0))
+
+    closing_2024 = 450 - year_target(2024, emp.hire_date)
+    closing_2025 = closing_2024 + 570 - year_target(2025, emp.hire_date)
+    assert close_year(session, 2024, today=TODAY) == 1
+    # 2025 is still open: its months are added to the 2024 checkpoint.
+    assert fetch_carry_over(session, 2026) == {emp.id: (closing_2025, False)}
+    assert close_year(session, 2025, today=TODAY) == 1
+
+    assert fetch_carry_over(session, 2025) == {emp.id: (closing_2024, False)}
+    assert fetch_carry_over(session, 2026, [emp.id]) == {emp.id: (closing_2025, False)}
+    assert fetch_carry_over(session, 2024) == {}
+
+
+def test_carry_over_counts_staff_hired_after_the_last_close(
+    session, add_employee, add_entry
+):
+    add_employee(hire_date=date(2020, 1, 1))
+    close_year(session, 2023, today=TODAY)
+    newcomer = add_employee(hire_date=date(2025, 12, 1))
+    add_entry(newcomer, date(2025, 12, 1))
+
+    carry = fetch_carry_over(session, 2026, [newcomer.id])
+    assert carry == {newcomer.id: (450 - year_target(2025, newcomer.hire_date), False)}
+
+
+def test_close_year_rejects_open_years_and_gaps(session, add_employee):
+    add_employee(hire_date=date(2020, 1, 1))
+    with pytest.raises(ValueError):
+        close_year(session, 2026, today=TODAY)
+    close_year(session, 2023, today=TODAY)
+    with pytest.raises(ValueError):
+        close_year(session, 2025, today=TODAY)
+
+
+def test_first_close_must_cover_earlier_entries(session, add_employee, add_entry):
+    emp = add_employee(hire_date=HIRED)
+    add_entry(emp, date(2024, 12, 2))
+    with pytest.raises(ValueError, match="Close 2024 first"):
+        close_year(session, 2025, today=TODAY)
+
+
+def test_reclosing_a_year_marks_later_checkpoints_stale(session, add_employee):
+    add_employee(hire_date=HIRED)
+    close_year(session, 2024, today=TODAY)
+    close_year(session, 2025, today=TODAY)
+
+    close_year(session, 2024, today=TODAY)
+
+    stale = session.exec(
+        select(OvertimeCheckpoint.year, OvertimeCheckpoint.stale).order_by(
+            OvertimeCheckpoint.year
+        )
+    ).all()
+    assert stale == [(2024, False), (2025, True)]
+
+
+def test_close_year_skips_employees_hired_later(session, add_employee):
+    add_employee(hire_date=date(2025, 6, 1))
+    assert close_year(session, 2024, today=TODAY) == 0
+
+
+def test_entry_in_closed_year_marks_checkpoints_stale(session, add_employee, add_entry):
+    emp = add_employee(hire_date=HIRED)
+    close_year(session, 2024, today=TODAY)
+    close_year(session, 2025, today=TODAY)
+
+    add_entry(emp, date(2025, 1, 6))
+
+    stale = session.exec(
+        select(OvertimeCheckpoint.year, OvertimeCheckpoint.stale).order_by(
+            OvertimeCheckpoint.year
+        )
+    ).all()
+    assert stale == [(2024, False), (2025, True)]
+    assert fetch_carry_over(session, 2026)[emp.id][1] is True
+
+    assert recompute_checkpoints(session, today=TODAY) == [2025]
+    minutes, is_stale = fetch_carry_over(session, 2026)[emp.id]
+    assert not is_stale
+    assert minutes == (
+        -year_target(2024, emp.hire_date) + 450 - year_target(2025, emp.hire_date)
+    )
+    assert recompute_checkpoints(session, today=TODAY) == []
+
+
+def test_report_cards_show_carry_over_and_balance(
+    client, session, add_employee, add_entry
+):
+    emp = add_employee(hire_date=date(2024, 12, 30))  # 2 workdays in 2024
+    close_year(session, 2024, today=TODAY)
+    add_entry(emp, date(2025, 1, 6))  # one entry, every month of 2025 is due
+
+    card = client.get("/report/cards?year=2025").get_json()["cards"][0]
+    diff = 450 - year_target(2025, emp.hire_date)
+    assert (card["sum_diff_sign"], card["sum_diff_txt"]) == ("-", hours(diff))
+    assert (card["carry_sign"], card["carry_txt"]) == ("-", "16,0")
+    assert (card["balance_sign"], card["balance_txt"]) == ("-", hours(diff - 960))
+    assert card["balance_stale"] is False
+    assert "Carry-over 2024" in client.get("/report?year=2025").get_data(as_text=True)
+
+
+def test_report_statement_and_close_agree_on_empty_months(
+    client, session, add_employee, add_entry
+):
+    emp = add_employee(hire_date=date(2025, 1, 1))
+    add_entry(emp, date(2025, 1, 6))
+    add_entry(emp, date(2025, 3, 3))  # February has no entries at all
+
+    card = client.get("/report/cards?year=2025").get_json()["cards"][0]
+    (statement,) = build_statements(session, [emp.id], 2025)
+    close_year(session, 2025, today=TODAY)
+    closing = session.get(OvertimeCheckpoint, (emp.id, 2025)).closing_minutes
+
+    assert closing == 900 - year_target(2025, emp.hire_date)
+    assert (card["balance_sign"], card["balance_txt"]) == ("-", hours(closing))
+    assert statement["balance"] == f"-{fmt_hhmm(-closing)}"
@@ -0,0 +1,152 @@
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlmodel import Session, SQLModel, create_engine
+
+from core import (
+    TIME_ENTRY_KEY,
+    _existing_entry_keys,
+    fetch_available_years,
+    fetch_employee_entries,
+    fetch_entry_page,
+    iter_entry_export_rows,
+    sync_indexes,
+)
+
+# Postgres plans are only checked against a throwaway database, e.g.
+# TEST_POSTGRES_URL=postgresql://localhost/timetracker_test; its tables are
+# dropped after each test.
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def plan_engine(request, engine):
+    if request.param == "sqlite":
+        yield engine
+        return
+    if not POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    pg_engine = create_engine(POSTGRES_URL)
+    SQLModel.metadata.drop_all(pg_engine)
+    SQLModel.metadata.create_all(pg_engine)
+    yield pg_engine
+    SQLModel.metadata.drop_all(pg_engine)
+    pg_engine.dispose()
+
+
+@pytest.fixture
+def plan_session(plan_engine, add_employee, add_entry):
+    with Session(plan_engine) as s:
+        emp = add_employee(s=s)
+        for day in (date(2024, 1, 8), date(2024, 1, 9)):
+            add_entry(emp, day, start=time(8, 0), end=time(16, 0), s=s)
+        yield s
+
+
+@contextmanager
+def time_entry_selects(engine):
+    """Collect (statement, parameters) of SELECTs on time_entry."""
+    captured: list[tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if (
+            statement.lstrip().upper().startswith("SELECT")
+            and "time_entry" in statement
+        ):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(engine, statement: str, parameters) -> str:
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        else:
+            # Test tables are tiny, so make Postgres show whether an index
+            # can serve the query instead of what is cheapest for two rows.
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            conn.exec_driver_sql("SET enable_sort = off")
+            rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        return "\n".join(str(row[-1]) for row in rows)
+
+
+def assert_index_plan(engine, plan: str, index: str) -> None:
+    assert index in plan, plan
+    if engine.dialect.name == "sqlite":
+        assert not re.search(r"SCAN time_entry$", plan, re.M), plan
+        assert "TEMP B-TREE" not in plan, plan
+    else:
+        assert "Seq Scan on time_entry" not in plan, plan
+        assert "Sort" not in plan, plan
+
+
+def plan_of(engine, run) -> str:
+    with time_entry_selects(engine) as captured:
+        run()
+    statement, parameters = captured[0]
+    return explain(engine, statement, parameters)
+
+
+def test_employee_entries_read_in_index_order(plan_engine, plan_session):
+    plan = plan_of(plan_engine, lambda: fetch_employee_entries(plan_session, 1))
+    assert_index_plan(plan_engine, plan, "ix_time_entry_employee_id_Date_Start")
+
+
+def test_employee_export_reads_in_index_order(plan_engine, plan_session):
+    plan = plan_of(
+        plan_engine,
+        lambda: list(iter_entry_export_rows(plan_engine, year=2024, employee_id=1)),
+    )
+    assert_index_plan(plan_engine, plan, "ix_time_entry_employee_id_Date_Start")
+
+
+def test_entry_page_seeks_inside_date_range(plan_engine, plan_session):
+    plan = plan_of(
+        plan_engine,
+        lambda: fetch_entry_page(
+            plan_session,
+            1,
+            date(2024, 1, 1),
+            date(2024, 2, 1),
+            after=(date(2024, 1, 8), time(8, 0)),
+            limit=10,
+        ),
+    )
+    assert_index_plan(plan_engine, plan, "ix_time_entry_employee_id_Date_Start")
+
+
+def test_import_duplicate_probe_uses_key_index(plan_engine, plan_session):
+    rows = [{"employee_id": 1, "Date": date(2024, 1, 8), "Start": time(8, 0)}]
+    plan = plan_of(plan_engine, lambda: _existing_entry_keys(plan_session, rows))
+    assert_index_plan(plan_engine, plan, "ix_time_entry_employee_id_Date_Start")
+
+
+def test_available_years_seek_date_index(plan_engine, plan_session):
+    plan = plan_of(plan_engine, lambda: fetch_available_years(plan_session))
+    assert_index_plan(plan_engine, plan, "ix_time_entry_Date_net_minutes")
+
+
+def test_save_time_entry_conflict_target_is_unique_index(plan_engine):
+    # ON CONFLICT (TIME_ENTRY_KEY) resolves through this index; without it the
+    # insert fails instead of scanning.
+    indexes = inspect(plan_engine).get_indexes("time_entry")
+    assert any(ix["unique"] and ix["column_names"] == TIME_ENTRY_KEY for ix in indexes)
+
+
+def test_sync_indexes_rebuilds_missing_index(plan_engine):
+    with plan_engine.begin() as conn:
+        conn.execute(text('DROP INDEX "ix_time_entry_Date_net_minutes"'))
+
+    assert sync_indexes(plan_engine) == ["ix_time_entry_Date_net_minutes"]
+    assert sync_indexes(plan_engine) == []
+    names = {ix["name"] for ix in inspect(plan_engine).get_indexes("time_entry")}
+    assert "ix_time_entry_Date_net_minutes" in names
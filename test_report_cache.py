@@ -0,0 +1,30 @@
+from report_cache import ReportCache
+
+
+def test_report_cache_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ReportCache(path, max_entries=2)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") == b"A"  # "b" is now the oldest
+
+    cache.put("c", b"C")
+
+    other_worker = ReportCache(path, max_entries=2)
+    assert other_worker.get("b") is None
+    assert other_worker.get("a") == b"A"
+    assert other_worker.get("c") == b"C"
+
+
+def test_report_cache_disabled(tmp_path):
+    cache = ReportCache(str(tmp_path / "cache.db"), max_entries=0)
+    cache.put("a", b"A")
+    assert cache.get("a") is None
+
+
+def test_report_cache_creates_file_on_first_use(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = ReportCache(str(path))
+    assert not path.exists()
+    assert cache.get("a") is None
+    assert path.exists()
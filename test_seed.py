@@ -0,0 +1,32 @@
+from datetime import date
+
+from sqlmodel import select
+
+from core import verify_monthly_summary
+from models import Employee, TimeEntry, net_minutes_between
+from seed import seed_database
+
+
+def test_seed_database_writes_valid_rows(engine, session):
+    result = seed_database(
+        engine, employees=40, start=date(2024, 1, 1), end=date(2024, 2, 29)
+    )
+
+    employees = session.exec(select(Employee)).all()
+    entries = session.exec(select(TimeEntry)).all()
+    assert (result.employees, result.entries) == (40, len(entries))
+    assert len({e.email for e in employees}) == 40
+    for emp in employees:
+        Employee.model_validate(emp.model_dump())
+        assert emp.hire_date <= date(2024, 1, 1)
+    assert all(
+        e.net_minutes == net_minutes_between(e.Start, e.Ende, e.Pause) for e in entries
+    )
+    assert any(e.Ende < e.Start for e in entries)  # overnight shifts
+    assert verify_monthly_summary(session) == []
+
+    # Seeding again appends without clashing on unique emails.
+    again = seed_database(
+        engine, employees=5, start=date(2024, 1, 1), end=date(2024, 1, 31)
+    )
+    assert again.employees == 5
@@ -0,0 +1,76 @@
+import csv
+from datetime import date, time
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+from core import get_engine
+from models import Employee
+from statements import build_statements, generate_statements
+
+
+@pytest.fixture
+def add_staff(add_employee, add_entry):
+    def add(count=3, s=None) -> list[Employee]:
+        staff = []
+        for n in range(count):
+            emp = add_employee(f"E{n}", "Test", s=s)
+            for day in (date(2025, 8, 29), date(2025, 9, 1), date(2025, 9, 2)):
+                add_entry(emp, day, start=time(8, 0), end=time(16, 30), s=s)
+            staff.append(emp)
+        return staff
+
+    return add
+
+
+def test_statements_in_process_cover_only_the_month(engine, add_staff, tmp_path):
+    staff = add_staff()
+
+    result = generate_statements(
+        engine, year=2025, month=9, out_dir=str(tmp_path), fmt="txt", workers=1
+    )
+
+    assert result.employees == 3
+    text = (tmp_path / f"statement_2025-09_employee-{staff[0].id}.txt").read_text()
+    assert "Statement September 2025" in text
+    assert "Mon 01.09.2025" in text and "29.08.2025" not in text
+    assert "September 2025           16:00 /    176:00  -160:00" in text
+
+
+def test_statement_balance_stops_at_today(session, add_staff):
+    staff = add_staff(count=1)
+    next_year = date.today().year + 1
+
+    (statement,) = build_statements(session, [staff[0].id], next_year, month=3)
+
+    assert statement["diff"].startswith("-")  # March has a target...
+    assert statement["balance"] == "+00:00"  # ...but is not due yet
+
+
+def test_statements_in_worker_processes(add_staff, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'pool.db'}")
+    engine = get_engine()
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        staff_ids = [e.id for e in add_staff(count=4, s=s)]
+    progress = []
+
+    result = generate_statements(
+        engine,
+        year=2025,
+        month=9,
+        out_dir=str(tmp_path / "out"),
+        fmt="csv",
+        employee_ids=staff_ids[:3],
+        workers=2,
+        chunk_size=1,
+        progress=lambda r, total: progress.append((r.employees, total)),
+    )
+
+    assert sorted(progress) == [(1, 3), (2, 3), (3, 3)]
+    assert len(result.files) == 3
+    with open(result.files[0], newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["date"] for r in rows] == ["2025-09-01", "2025-09-02"]
+    assert rows[0]["net_minutes"] == "480"
+    engine.dispose()
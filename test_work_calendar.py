@@ -0,0 +1,46 @@
+from datetime import date
+
+import pytest
+
+from models import PublicHoliday
+from work_calendar import WorkCalendar, load_work_calendar
+
+
+@pytest.mark.parametrize(
+    "year,month,expected",
+    [
+        (2024, 2, 21),  # leap year
+        (2025, 2, 20),
+        (2025, 3, 21),
+        (2025, 11, 20),
+        (2026, 5, 21),
+    ],
+)
+def test_workdays_in_month(year, month, expected):
+    assert WorkCalendar().workdays_in_month(year, month) == expected
+
+
+def test_holidays_and_hire_date_reduce_target():
+    cal = WorkCalendar(holidays=[date(2025, 12, 25), date(2025, 12, 26)])
+
+    assert cal.workdays_in_month(2025, 12) == 21
+    assert cal.target_minutes(2025, 12) == 21 * 8 * 60
+    # Hired on Monday 15.12.: 15.-19., 22.-24., 29.-31.
+    assert cal.target_minutes(2025, 12, hire_date=date(2025, 12, 15)) == 11 * 480
+    assert cal.target_minutes(2025, 11, hire_date=date(2025, 12, 15)) == 0
+    assert cal.target_minutes(2025, 12, hire_date=date(2020, 1, 1)) == 21 * 480
+
+
+def test_workdays_between_spans_years():
+    cal = WorkCalendar(holidays=[date(2025, 1, 1)])
+    assert cal.workdays_between(date(2024, 12, 30), date(2025, 1, 3)) == 4
+
+
+def test_load_work_calendar_reuses_calendar(session):
+    session.add(PublicHoliday(day=date(2025, 5, 1), name="Labour Day"))
+    session.commit()
+
+    cal = load_work_calendar(session)
+
+    assert cal.workdays_in_month(2025, 5) == 21
+    assert load_work_calendar(session) is cal
@@ -0,0 +1,81 @@
+# Working-day calendar for target hours.
+#
+# Workdays are Monday to Friday minus public holidays. Each year is turned
+# into a cumulative workday table once, after which any date range (a month,
+# or a month prorated from a hire date) is two lookups.
+
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterable
+
+from sqlmodel import Session, select
+
+from models import PublicHoliday
+
+HOURS_PER_DAY = 8
+
+
+class WorkCalendar:
+    def __init__(self, holidays: Iterable[date] = (), hours_per_day=HOURS_PER_DAY):
+        self.holidays = frozenset(holidays)
+        self.hours_per_day = hours_per_day
+        self._cumulative: dict[int, list[int]] = {}
+
+    def _year_table(self, year: int) -> list[int]:
+        # table[i] = number of workdays among the first i days of the year.
+        table = self._cumulative.get(year)
+        if table is None:
+            table = [0]
+            d = date(year, 1, 1)
+            while d.year == year:
+                is_workday = d.weekday() < 5 and d not in self.holidays
+                table.append(table[-1] + is_workday)
+                d += timedelta(days=1)
+            self._cumulative[year] = table
+        return table
+
+    def precompute(self, first_year: int, last_year: int) -> None:
+        for year in range(first_year, last_year + 1):
+            self._year_table(year)
+
+    def workdays_between(self, first: date, last: date) -> int:
+        # Both ends inclusive.
+        total = 0
+        for year in range(first.year, last.year + 1):
+            table = self._year_table(year)
+            start = first if first.year == year else date(year, 1, 1)
+            end = last if last.year == year else date(year, 12, 31)
+            total += (
+                table[end.timetuple().tm_yday] - table[start.timetuple().tm_yday - 1]
+            )
+        return max(0, total)
+
+    def workdays_in_month(self, year: int, month: int) -> int:
+        _, last_day = calendar.monthrange(year, month)
+        return self.workdays_between(date(year, month, 1), date(year, month, last_day))
+
+    def target_minutes(
+        self, year: int, month: int, hire_date: date | None = None
+    ) -> int:
+        _, last_day = calendar.monthrange(year, month)
+        first, last = date(year, month, 1), date(year, month, last_day)
+        if hire_date is not None:
+            if hire_date > last:
+                return 0
+            first = max(first, hire_date)
+        return self.workdays_between(first, last) * self.hours_per_day * 60
+
+
+@lru_cache(maxsize=8)
+def work_calendar(
+    holidays: frozenset[date] = frozenset(), hours_per_day: int = HOURS_PER_DAY
+) -> WorkCalendar:
+    return WorkCalendar(holidays, hours_per_day)
+
+
+def load_work_calendar(s: Session, hours_per_day: int = HOURS_PER_DAY) -> WorkCalendar:
+    # One small query per call; the calendar and its tables are reused for as
+    # long as the holiday list stays the same.
+    holidays = frozenset(s.exec(select(PublicHoliday.day)).all())
+    return work_calendar(holidays, hours_per_day)